@@ -216,9 +216,23 @@ class GeminiOCR:
             print(f"图片文件不存在: {image_path}")
             return None
         
+        print(f"开始识别图片: {image_path}")
+        with open(image_path, 'rb') as f:
+            image_bytes = f.read()
+        
+        mime_type = 'image/jpeg' if image_path.lower().endswith(('.jpg', '.jpeg')) else 'image/png'
+        return self.recognize_bytes(image_bytes, mime_type, question)
+    
+    def recognize_bytes(self, image_bytes, mime_type="image/jpeg", question="图里有什么内容？"):
+        """
+        通过Gemini API识别内存中的图片数据（无需先写入临时文件）
+        :param image_bytes: 图片二进制数据
+        :param mime_type: 图片MIME类型
+        :param question: 向Gemini提问的问题
+        :return: 识别结果字符串
+        """
         # 选择适合图像识别的模型
         self.model_name = self.select_best_model(task_type="image_supported")
-        print(f"开始识别图片: {image_path}")
         print(f"提问内容: {question}")
         print(f"当前使用模型: {self.model_name}")
         
@@ -230,15 +244,13 @@ class GeminiOCR:
             try:
                 # 使用内嵌方式传递图片数据
                 from google.genai import types
-                with open(image_path, 'rb') as f:
-                    image_bytes = f.read()
                 
                 # 构建消息内容
-                print(f"[DEBUG] 构建请求: 模型={self.model_name}, 图片路径={image_path}")
+                print(f"[DEBUG] 构建请求: 模型={self.model_name}, 图片大小={len(image_bytes)} 字节")
                 contents = [
                     types.Part.from_bytes(
                         data=image_bytes,
-                        mime_type='image/jpeg' if image_path.lower().endswith(('.jpg', '.jpeg')) else 'image/png'
+                        mime_type=mime_type
                     ),
                     question
                 ]
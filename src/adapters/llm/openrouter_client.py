@@ -22,7 +22,8 @@ class OpenRouterClient:
     
     def __init__(self, api_key: Optional[str] = None,
                  model: str = "tngtech/deepseek-r1t2-chimera:free",
-                 base_url: str = "https://openrouter.ai/api/v1"):
+                 base_url: str = "https://openrouter.ai/api/v1",
+                 prompt_cache: Optional[bool] = None):
         """
         初始化OpenRouter客户端
         
@@ -30,10 +31,15 @@ class OpenRouterClient:
             api_key: OpenRouter API密钥
             model: 默认使用的模型名称
             base_url: API基础URL
+            prompt_cache: 是否为系统提示词开启服务端提示词缓存（cache_control），
+                默认读取环境变量 OPENROUTER_PROMPT_CACHE
         """
         self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
         self.model = model
         self.base_url = base_url or os.getenv("OPENROUTER_API_BASE_URL", "https://openrouter.ai/api/v1")
+        if prompt_cache is None:
+            prompt_cache = os.getenv("OPENROUTER_PROMPT_CACHE", "false").lower() == "true"
+        self.prompt_cache = prompt_cache
         
         if not self.api_key:
             raise ValueError("OpenRouter API密钥未配置")
@@ -68,6 +74,30 @@ class OpenRouterClient:
         
         self._last_request_time = datetime.now()
     
+    def _build_system_message(self, system_prompt: str) -> Dict[str, Any]:
+        """
+        构建系统消息
+        
+        开启 prompt_cache 时以内容块形式发送并标记 cache_control，
+        让支持提示词缓存的模型（Anthropic / Gemini 等）在服务端缓存这段稳定前缀
+        
+        Args:
+            system_prompt: 系统提示词
+            
+        Returns:
+            Dict: 系统消息
+        """
+        if not self.prompt_cache:
+            return {"role": "system", "content": system_prompt}
+        return {
+            "role": "system",
+            "content": [{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }]
+        }
+    
     def chat(self, message: str,
              model: Optional[str] = None,
              system_prompt: Optional[str] = None,
@@ -95,7 +125,7 @@ class OpenRouterClient:
         
         messages = []
         if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
+            messages.append(self._build_system_message(system_prompt))
         
         messages.extend(self.conversation_history)
         messages.append({"role": "user", "content": message})
@@ -1,8 +1,20 @@
 from abc import ABC, abstractmethod
-from typing import Callable, Any, Dict, Optional, List
+from typing import Callable, Any, Dict, Optional, List, Tuple
+from functools import cached_property
 from pydantic import BaseModel
+import asyncio
+import logging
 import time
 
+logger = logging.getLogger("BaseChannel")
+
+# Outbound coalescing: text messages queued for the same chat within
+# WRITE_DELAY seconds are joined into one platform API call, up to
+# MAX_MESSAGES_IN_FRAME messages per call.
+WRITE_DELAY = 0.05
+MAX_MESSAGES_IN_FRAME = 4
+_UNBATCHABLE_TYPES = frozenset({"image", "file"})
+
 class UnifiedMessage(BaseModel):
     """
     Unified representation of a message from any platform.
@@ -13,7 +25,7 @@ class UnifiedMessage(BaseModel):
     message_type: str      # "private" or "group"
     content: str           # Text content of the message
     images: List[str] = [] # List of image URLs (支持多模态消息)
-    raw_data: Dict[str, Any] = {} # Original platform message for advanced use
+    raw_data: Any = {}     # Original platform message (dict or pydantic model) for advanced use
     timestamp: float = 0.0
 
     def __init__(self, **data):
@@ -21,6 +33,18 @@ class UnifiedMessage(BaseModel):
         if not self.timestamp:
             self.timestamp = time.time()
 
+    @cached_property
+    def raw_dict(self) -> Dict[str, Any]:
+        """
+        raw_data as a plain dict, serialized lazily on first access.
+        Channels may pass the platform's pydantic model as-is to avoid
+        dumping every inbound message up front.
+        """
+        raw = self.raw_data
+        if isinstance(raw, BaseModel):
+            return raw.model_dump()
+        return raw
+
 
 class UnifiedSendRequest(BaseModel):
     """
@@ -41,6 +65,9 @@ class BaseChannel(ABC):
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.message_handler: Optional[Callable[[UnifiedMessage], None]] = None
+        # (chat_id, message_type) -> (pending (request, future) pairs, flush timer)
+        self._outbox: Dict[Tuple[str, str], Tuple[List[Tuple[UnifiedSendRequest, asyncio.Future]], asyncio.TimerHandle]] = {}
+        self._delivery_tasks: set = set()
 
     @abstractmethod
     async def start(self):
@@ -57,6 +84,65 @@ class BaseChannel(ABC):
         """Send a compiled UnifiedSendRequest to this channel."""
         pass
 
+    def send_message_batched(self, request: UnifiedSendRequest) -> "asyncio.Future[bool]":
+        """
+        Queue a message for coalesced delivery.
+
+        Text messages to the same chat arriving within WRITE_DELAY are joined
+        with blank lines and sent as one request. Returns a future resolving to
+        the send result; callers that don't need it may simply not await it.
+        Use send_message() directly for latency-sensitive messages.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        if (request.message_type in _UNBATCHABLE_TYPES
+                or request.reply_to_id or request.platform_specific):
+            self._spawn_delivery([(request, future)])
+            return future
+
+        key = (request.chat_id, request.message_type)
+        pending = self._outbox.get(key)
+        if pending is None:
+            timer = loop.call_later(WRITE_DELAY, self._flush_outbox, key)
+            pending = self._outbox[key] = ([], timer)
+        batch = pending[0]
+        batch.append((request, future))
+        if len(batch) >= MAX_MESSAGES_IN_FRAME:
+            self._flush_outbox(key)
+        return future
+
+    def _flush_outbox(self, key: Tuple[str, str]):
+        pending = self._outbox.pop(key, None)
+        if pending:
+            batch, timer = pending
+            timer.cancel()
+            self._spawn_delivery(batch)
+
+    def _spawn_delivery(self, batch: List[Tuple[UnifiedSendRequest, asyncio.Future]]):
+        task = asyncio.get_running_loop().create_task(self._deliver(batch))
+        self._delivery_tasks.add(task)
+        task.add_done_callback(self._delivery_tasks.discard)
+
+    async def _deliver(self, batch: List[Tuple[UnifiedSendRequest, asyncio.Future]]):
+        first = batch[0][0]
+        if len(batch) == 1:
+            request = first
+        else:
+            request = UnifiedSendRequest(
+                chat_id=first.chat_id,
+                message_type=first.message_type,
+                content="\n\n".join(req.content for req, _ in batch)
+            )
+        try:
+            success = await self.send_message(request)
+        except Exception as e:
+            logger.error(f"Batched send to {first.chat_id} failed: {e}")
+            success = False
+        for _, future in batch:
+            if not future.done():
+                future.set_result(success)
+
     def register_handler(self, handler: Callable[[UnifiedMessage], None]):
         """Register the central message processing handler."""
         self.message_handler = handler
@@ -7,12 +7,34 @@ import sys
 import os
 import uuid
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+
+from lark_oapi.api.im.v1 import CreateMessageRequest, CreateMessageRequestBody
 
 from ..base import BaseChannel, UnifiedMessage, UnifiedSendRequest
 from adapters.lark.lark_client import LarkWSClient
 
 logger = logging.getLogger("LarkChannel")
 
+# 各文件类型的展示名称与提示文案（模块级常量，避免每条消息重复构建）
+_TYPE_EMOJI = {"image": "🖼️", "file": "📄", "audio": "🎵", "media": "🎬"}
+_TYPE_NAME = {"image": "图片", "file": "文件", "audio": "音频", "media": "视频"}
+_PROCESSING_TEMPLATE = {
+    t: f"{_TYPE_EMOJI[t]} 收到{_TYPE_NAME[t]}，正在处理..." for t in _TYPE_EMOJI
+}
+_FAIL_TEMPLATE = {t: f"❌ {_TYPE_NAME[t]}下载失败，请重试。" for t in _TYPE_NAME}
+_DEFAULT_PROCESSING = "📎 收到文件，正在处理..."
+_DEFAULT_FAIL = "❌ 文件下载失败，请重试。"
+
+_IMAGE_PROMPT = "请详细描述这张图片的内容，如果包含文字请提取出来。"
+
+
+def _format_file_size(file_size: int) -> str:
+    """将字节数格式化为 KB / MB 字符串"""
+    if file_size < 1024 * 1024:
+        return f"{file_size / 1024:.1f} KB"
+    return f"{file_size / 1024 / 1024:.2f} MB"
+
 class LarkChannel(BaseChannel):
     """
     Channel implementation for Lark (Feishu) using the existing LarkWSClient.
@@ -35,6 +57,15 @@ class LarkChannel(BaseChannel):
             verification_token=self.verification_token
         )
         self._is_running = False
+        # 主事件循环，在 start() 中捕获，供 WebSocket 线程回调投递协程
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # 专用 OCR 线程池，避免与默认 executor 争用；GeminiOCR 首次使用时创建并复用
+        self._ocr_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lark-ocr")
+        self._ocr = None
+
+        # chat_id -> receive_id_type 缓存，同一会话只判断一次 ID 前缀
+        self._receive_id_type_cache: Dict[str, str] = {}
 
     async def start(self):
         """
@@ -48,6 +79,7 @@ class LarkChannel(BaseChannel):
             self._handle_lark_message_event
         )
 
+        self._loop = asyncio.get_running_loop()
         self._is_running = True
         logger.info("Starting Lark WebSocket client in background thread...")
         
@@ -60,6 +92,7 @@ class LarkChannel(BaseChannel):
         self._is_running = False
         if self.client:
             self.client.stop()
+        self._ocr_executor.shutdown(wait=False)
         logger.info("Lark channel stopped.")
 
     async def send_message(self, request: UnifiedSendRequest) -> bool:
@@ -70,9 +103,6 @@ class LarkChannel(BaseChannel):
             if not self.client.is_connected():
                 logger.warning("Lark client not connected, attempting to send anyway (might fail)")
 
-            from lark_oapi.api.im.v1 import CreateMessageRequest, CreateMessageRequestBody
-            import uuid
-
             msg_type = "text"
             content_dict = {}
 
@@ -93,9 +123,10 @@ class LarkChannel(BaseChannel):
             # 默认优先使用 chat_id，如果 request.chat_id 看起来像 open_id (ou_开头) 则使用 open_id
             # 实际上 Lark 的 chat_id (oc_开头) 和 open_id (ou_开头) 格式很明显
             
-            receive_id_type = "chat_id"
-            if request.chat_id.startswith("ou_"):
-                receive_id_type = "open_id"
+            receive_id_type = self._receive_id_type_cache.get(request.chat_id)
+            if receive_id_type is None:
+                receive_id_type = "open_id" if request.chat_id.startswith("ou_") else "chat_id"
+                self._receive_id_type_cache[request.chat_id] = receive_id_type
             
             # Construction of request
             req = (CreateMessageRequest.builder()
@@ -121,6 +152,15 @@ class LarkChannel(BaseChannel):
             logger.error(f"Error sending Lark message: {e}")
             return False
 
+    def _schedule(self, coro):
+        """
+        从 WebSocket 回调线程把协程投递到主事件循环执行。
+
+        结果从不被消费，因此直接 call_soon_threadsafe + create_task，
+        省去 run_coroutine_threadsafe 的 Future 分配和完成回调链。
+        """
+        self._loop.call_soon_threadsafe(self._loop.create_task, coro)
+
     def _handle_lark_message_event(self, event_data: Dict):
         """
         Callback for Lark message events.
@@ -193,10 +233,7 @@ class LarkChannel(BaseChannel):
                         )
                         
                         # 使用与文本消息相同的处理方式
-                        asyncio.run_coroutine_threadsafe(
-                            self.on_message_received(unified_msg),
-                            asyncio.get_event_loop()
-                        )
+                        self._schedule(self.on_message_received(unified_msg))
                     else:
                         logger.error(f"图片下载失败: {image_key}")
                     return
@@ -215,7 +252,7 @@ class LarkChannel(BaseChannel):
                         logger.error("Cannot process file: both chat_id and sender_id are None")
                         return
                     
-                    asyncio.create_task(self._process_file_message(
+                    self._schedule(self._process_file_message(
                         message_id=message_id,
                         file_key=file_key,
                         chat_id=target_id,
@@ -238,7 +275,7 @@ class LarkChannel(BaseChannel):
                         logger.error("Cannot process audio: both chat_id and sender_id are None")
                         return
                     
-                    asyncio.create_task(self._process_file_message(
+                    self._schedule(self._process_file_message(
                         message_id=message_id,
                         file_key=audio_key,
                         chat_id=target_id,
@@ -260,7 +297,7 @@ class LarkChannel(BaseChannel):
                         logger.error("Cannot process media: both chat_id and sender_id are None")
                         return
                     
-                    asyncio.create_task(self._process_file_message(
+                    self._schedule(self._process_file_message(
                         message_id=message_id,
                         file_key=media_key,
                         chat_id=target_id,
@@ -287,10 +324,7 @@ class LarkChannel(BaseChannel):
             )
 
             # Fire and forget (it's async)
-            asyncio.run_coroutine_threadsafe(
-                self.on_message_received(unified_msg),
-                asyncio.get_event_loop()
-            )
+            self._schedule(self.on_message_received(unified_msg))
 
         except Exception as e:
             logger.error(f"Error handling Lark event: {e}")
@@ -305,6 +339,8 @@ class LarkChannel(BaseChannel):
     ):
         """
         处理各类型文件消息：下载 -> 处理 -> 回复
+
+        处理提示立即发送；结果与错误提示经 send_message_batched 发送，短时间内的多条回复会合并为一次 API 调用。
         
         Args:
             message_id: 消息ID
@@ -316,14 +352,11 @@ class LarkChannel(BaseChannel):
         try:
             logger.info(f"开始处理{file_type}消息: {message_id}, key: {file_key}")
             
-            # 根据文件类型发送不同的处理提示
-            type_emoji = {"image": "🖼️", "file": "📄", "audio": "🎵", "media": "🎬"}
-            type_name = {"image": "图片", "file": "文件", "audio": "音频", "media": "视频"}
-            
+            # 根据文件类型发送不同的处理提示（下载前立即发出，不参与合并）
             await self.send_message(UnifiedSendRequest(
                 chat_id=chat_id,
                 message_type="text",
-                content=f"{type_emoji.get(file_type, '📎')} 收到{type_name.get(file_type, '文件')}，正在处理..."
+                content=_PROCESSING_TEMPLATE.get(file_type, _DEFAULT_PROCESSING)
             ))
             
             # 下载文件
@@ -331,10 +364,10 @@ class LarkChannel(BaseChannel):
             file_data = self.client.get_message_resource(message_id, file_key, resource_type)
             
             if not file_data:
-                await self.send_message(UnifiedSendRequest(
+                self.send_message_batched(UnifiedSendRequest(
                     chat_id=chat_id,
                     message_type="text",
-                    content=f"❌ {type_name.get(file_type, '文件')}下载失败，请重试。"
+                    content=_FAIL_TEMPLATE.get(file_type, _DEFAULT_FAIL)
                 ))
                 return
 
@@ -354,17 +387,18 @@ class LarkChannel(BaseChannel):
             with open(temp_path, "wb") as f:
                 f.write(file_data)
             
-            logger.info(f"{type_name.get(file_type, '文件')}已保存到: {temp_path}, 大小: {len(file_data)} bytes")
+            file_size = len(file_data)
+            logger.info(f"{_TYPE_NAME.get(file_type, '文件')}已保存到: {temp_path}, 大小: {file_size} bytes")
 
-            # 根据文件类型进行不同处理
+            # 根据文件类型进行不同处理（大小已知，无需再 stat 临时文件）
             if file_type == "image":
                 await self._process_image_with_gemini(temp_path, chat_id)
             elif file_type == "file":
-                await self._process_document_file(temp_path, file_name, chat_id)
+                await self._process_document_file(file_size, file_name, chat_id)
             elif file_type == "audio":
-                await self._process_audio_file(temp_path, chat_id)
+                await self._process_audio_file(file_size, chat_id)
             elif file_type == "media":
-                await self._process_media_file(temp_path, chat_id)
+                await self._process_media_file(file_size, chat_id)
             
             # 清理临时文件
             try:
@@ -374,7 +408,7 @@ class LarkChannel(BaseChannel):
 
         except Exception as e:
             logger.error(f"处理{file_type}消息流程异常: {e}")
-            await self.send_message(UnifiedSendRequest(
+            self.send_message_batched(UnifiedSendRequest(
                 chat_id=chat_id,
                 message_type="text",
                 content=f"⚠️ 处理出错: {str(e)}"
@@ -389,27 +423,25 @@ class LarkChannel(BaseChannel):
             chat_id: 聊天ID
         """
         try:
-            from config import get_settings
-            from adapters.gemini.gemini_ocr import GeminiOCR
-            
-            settings = get_settings()
-            ocr = GeminiOCR(api_key=settings.gemini_api_key)
+            if self._ocr is None:
+                from config import get_settings
+                from adapters.gemini.gemini_ocr import GeminiOCR
+                self._ocr = GeminiOCR(api_key=get_settings().gemini_api_key)
             
             loop = asyncio.get_running_loop()
             result = await loop.run_in_executor(
-                None, 
-                lambda: ocr.recognize_image(temp_path, "请详细描述这张图片的内容，如果包含文字请提取出来。")
+                self._ocr_executor, self._ocr.recognize_image, temp_path, _IMAGE_PROMPT
             )
             
             if result and result.get("success"):
                 response_text = result.get("response", "识别成功，但没有返回内容")
-                await self.send_message(UnifiedSendRequest(
+                self.send_message_batched(UnifiedSendRequest(
                     chat_id=chat_id,
                     message_type="text",
                     content=f"📝 **图片分析结果**:\n\n{response_text}"
                 ))
             else:
-                await self.send_message(UnifiedSendRequest(
+                self.send_message_batched(UnifiedSendRequest(
                     chat_id=chat_id,
                     message_type="text",
                     content="⚠️ 图片识别失败，可能是 API 限额或网络问题。"
@@ -417,66 +449,63 @@ class LarkChannel(BaseChannel):
 
         except ImportError:
             logger.error("无法导入 gemini_ocr，请检查路径")
-            await self.send_message(UnifiedSendRequest(
+            self.send_message_batched(UnifiedSendRequest(
                 chat_id=chat_id,
                 message_type="text",
                 content="⚠️ 系统配置错误：无法加载 OCR 模块。"
             ))
         except Exception as e:
             logger.error(f"OCR 过程出错: {e}")
-            await self.send_message(UnifiedSendRequest(
+            self.send_message_batched(UnifiedSendRequest(
                 chat_id=chat_id,
                 message_type="text",
                 content=f"⚠️ 处理出错: {str(e)}"
             ))
 
-    async def _process_document_file(self, temp_path: str, file_name: str, chat_id: str):
+    async def _process_document_file(self, file_size: int, file_name: str, chat_id: str):
         """
         处理文档文件
         
         Args:
-            temp_path: 临时文件路径
+            file_size: 文件大小(字节)
             file_name: 文件名
             chat_id: 聊天ID
         """
-        file_size = os.path.getsize(temp_path)
-        file_size_str = f"{file_size / 1024:.1f} KB" if file_size < 1024 * 1024 else f"{file_size / 1024 / 1024:.2f} MB"
+        file_size_str = _format_file_size(file_size)
         
-        await self.send_message(UnifiedSendRequest(
+        self.send_message_batched(UnifiedSendRequest(
             chat_id=chat_id,
             message_type="text",
             content=f"✅ 文件已接收：\n📄 文件名: {file_name}\n📦 大小: {file_size_str}\n\n暂不支持文档内容解析，请等待后续版本更新。"
         ))
 
-    async def _process_audio_file(self, temp_path: str, chat_id: str):
+    async def _process_audio_file(self, file_size: int, chat_id: str):
         """
         处理音频文件
         
         Args:
-            temp_path: 临时文件路径
+            file_size: 文件大小(字节)
             chat_id: 聊天ID
         """
-        file_size = os.path.getsize(temp_path)
-        file_size_str = f"{file_size / 1024:.1f} KB" if file_size < 1024 * 1024 else f"{file_size / 1024 / 1024:.2f} MB"
+        file_size_str = _format_file_size(file_size)
         
-        await self.send_message(UnifiedSendRequest(
+        self.send_message_batched(UnifiedSendRequest(
             chat_id=chat_id,
             message_type="text",
             content=f"✅ 音频已接收：\n📦 大小: {file_size_str}\n\n暂不支持音频转写，请等待后续版本更新。"
         ))
 
-    async def _process_media_file(self, temp_path: str, chat_id: str):
+    async def _process_media_file(self, file_size: int, chat_id: str):
         """
         处理视频文件
         
         Args:
-            temp_path: 临时文件路径
+            file_size: 文件大小(字节)
             chat_id: 聊天ID
         """
-        file_size = os.path.getsize(temp_path)
-        file_size_str = f"{file_size / 1024:.1f} KB" if file_size < 1024 * 1024 else f"{file_size / 1024 / 1024:.2f} MB"
+        file_size_str = _format_file_size(file_size)
         
-        await self.send_message(UnifiedSendRequest(
+        self.send_message_batched(UnifiedSendRequest(
             chat_id=chat_id,
             message_type="text",
             content=f"✅ 视频已接收：\n📦 大小: {file_size_str}\n\n暂不支持视频处理，请等待后续版本更新。"
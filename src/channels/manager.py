@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, Optional, Callable, Awaitable
 import asyncio
 import logging
 from .base import BaseChannel, UnifiedMessage, UnifiedSendRequest
@@ -12,6 +12,8 @@ class ChannelManager:
     
     def __init__(self):
         self.channels: Dict[str, BaseChannel] = {}
+        # platform -> bound send_message, populated at registration for the send hot path
+        self._senders: Dict[str, Callable[[UnifiedSendRequest], Awaitable[bool]]] = {}
         self.global_handler: Optional[Callable[[UnifiedMessage], None]] = None
 
     def register_channel(self, name: str, channel: BaseChannel):
@@ -19,6 +21,7 @@ class ChannelManager:
         Register a new channel instance.
         """
         self.channels[name] = channel
+        self._senders[name] = channel.send_message
         logger.info(f"Registered channel: {name}")
 
         # If a global handler is already set, immediately register it
@@ -67,11 +70,12 @@ class ChannelManager:
         """
         Route a message to the specified platform channel.
         """
-        channel = self.channels.get(platform)
-        if not channel:
-            raise ValueError(f"Channel not found for platform: {platform}")
+        try:
+            sender = self._senders[platform]
+        except KeyError:
+            raise ValueError(f"Channel not found for platform: {platform}") from None
         
-        return await channel.send_message(request)
+        return await sender(request)
 
     def get_channel(self, name: str) -> Optional[BaseChannel]:
         return self.channels.get(name)
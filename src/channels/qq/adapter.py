@@ -186,7 +186,7 @@ class QQChannel(BaseChannel):
                 message_type=msg_type,
                 content=content,
                 images=images,  # 将图片URL列表传递
-                raw_data=message.dict(),
+                raw_data=message,  # 延迟序列化，见 UnifiedMessage.raw_dict
                 timestamp=float(message.time) if message.time else 0.0
             )
             
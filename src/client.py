@@ -5,16 +5,23 @@
 """
 
 import lark_oapi as lark
-from typing import Callable, Optional
+from typing import Callable, Dict, Optional, Tuple
 import os
 
 
+# 按 (app_id, app_secret, log_level) 缓存的客户端，同一凭证的 FeishuBot 共享连接池与 token 刷新
+# 缓存的客户端为进程内共享对象，调用方不要修改其配置
+_CLIENT_CACHE: Dict[Tuple[str, str, lark.LogLevel], lark.Client] = {}
+
+
 def create_client(app_id: Optional[str] = None, 
                   app_secret: Optional[str] = None,
                   log_level: lark.LogLevel = lark.LogLevel.INFO) -> lark.Client:
     """
     创建飞书客户端实例
 
+    相同凭证与日志级别复用同一个已构建的客户端
+
     Args:
         app_id: 飞书应用ID，如果为None则从环境变量FEISHU_APP_ID获取
         app_secret: 飞书应用密钥，如果为None则从环境变量FEISHU_APP_SECRET获取
@@ -38,11 +45,16 @@ def create_client(app_id: Optional[str] = None,
     if not app_secret:
         raise ValueError("飞书App Secret未配置，请设置FEISHU_APP_SECRET环境变量或传入app_secret参数")
     
-    return (lark.Client.builder()
-            .app_id(app_id)
-            .app_secret(app_secret)
-            .log_level(log_level)
-            .build())
+    key = (app_id, app_secret, log_level)
+    client = _CLIENT_CACHE.get(key)
+    if client is None:
+        client = (lark.Client.builder()
+                  .app_id(app_id)
+                  .app_secret(app_secret)
+                  .log_level(log_level)
+                  .build())
+        _CLIENT_CACHE[key] = client
+    return client
 
 
 class FeishuBot:
@@ -5,130 +5,176 @@
 """
 
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import FrozenInstanceError
+from functools import cache
+from typing import Any, Callable, Optional
+
+
+def _as_bool(value: str) -> bool:
+    return value.lower() == "true"
+
+
+_MISSING = object()
+
+
+class LazyField:
+    """
+    惰性配置字段描述符
+    
+    字段在首次访问时才解析（环境变量或默认值），结果缓存到实例 __dict__，
+    此后的访问直接命中实例属性，不再经过描述符。
+    """
+    
+    def __init__(self, default: Any,
+                 env_key: Optional[Any] = None,
+                 env_default: Any = _MISSING,
+                 caster: Optional[Callable[[Any], Any]] = None):
+        """
+        Args:
+            default: 直接构造 Settings() 时的默认值
+            env_key: 环境变量名，或按优先级排列的候选变量名元组
+            env_default: 从环境加载且变量缺失时的默认值（部署默认值，可与 default 不同）
+            caster: 类型转换函数
+        """
+        self.default = default
+        self.env_key = env_key
+        self.env_default = default if env_default is _MISSING else env_default
+        self.caster = caster
+        self.name = ""
+    
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+    
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        env = instance.__dict__.get("_env")
+        if env is None or self.env_key is None:
+            value = self.default
+        else:
+            if isinstance(self.env_key, tuple):
+                raw = next((env[k] for k in self.env_key if k in env), self.env_default)
+            else:
+                raw = env.get(self.env_key, self.env_default)
+            value = self.caster(raw) if self.caster and raw is not None else raw
+        instance.__dict__[self.name] = value
+        return value
 
 
-@dataclass
 class Settings:
     """
     应用配置类
     
-    集中管理所有应用配置项
+    集中管理所有应用配置项。各字段为 LazyField，首次读取时才解析。
+    实例创建后只读，可在线程间安全共享。
     """
     
     # 飞书配置
-    lark_app_id: str = ""
-    lark_app_secret: str = ""
-    lark_encrypt_key: str = ""
-    lark_verification_token: str = ""
+    lark_app_id: str = LazyField("", "FEISHU_APP_ID")
+    lark_app_secret: str = LazyField("", "FEISHU_APP_SECRET")
+    lark_encrypt_key: str = LazyField("", "FEISHU_ENCRYPT_KEY")
+    lark_verification_token: str = LazyField("", "FEISHU_VERIFICATION_TOKEN")
     
     # OpenRouter配置
-    openrouter_api_key: str = ""
-    openrouter_api_base_url: str = "https://openrouter.ai/api/v1"
-    openrouter_default_model: str = "tngtech/deepseek-r1t2-chimera:free"
+    openrouter_api_key: str = LazyField("", "OPENROUTER_API_KEY")
+    openrouter_api_base_url: str = LazyField("https://openrouter.ai/api/v1", "OPENROUTER_API_BASE_URL")
+    openrouter_default_model: str = LazyField("tngtech/deepseek-r1t2-chimera:free", "OPENROUTER_DEFAULT_MODEL")
     
     # DeepSeek配置
-    deepseek_api_key: str = ""
-    deepseek_api_base_url: str = "https://api.deepseek.com"
-    deepseek_model: str = "deepseek-chat"
+    deepseek_api_key: str = LazyField("", "DEEPSEEK_API_KEY")
+    deepseek_api_base_url: str = LazyField("https://api.deepseek.com", "DEEPSEEK_API_BASE_URL")
+    deepseek_model: str = LazyField("deepseek-chat", "DEEPSEEK_MODEL")
     
     # Qwen Portal配置
-    qwen_credentials_path: str = ""
-    qwen_default_model: str = "qwen-turbo"
-    qwen_oauth_base_url: str = "https://chat.qwen.ai"
-    qwen_oauth_client_id: str = "f0304373b74a44d2b584a3fb70ca9e56"
+    qwen_credentials_path: str = LazyField("", "QWEN_CREDENTIALS_PATH")
+    qwen_default_model: str = LazyField("qwen-turbo", "QWEN_DEFAULT_MODEL")
+    qwen_oauth_base_url: str = LazyField("https://chat.qwen.ai", "QWEN_OAUTH_BASE_URL")
+    qwen_oauth_client_id: str = LazyField("f0304373b74a44d2b584a3fb70ca9e56", "QWEN_OAUTH_CLIENT_ID")
     
     # 模型选择
-    active_model: str = "qwen"  # openrouter, deepseek, 或 qwen
+    active_model: str = LazyField("qwen", "ACTIVE_MODEL")  # openrouter, deepseek, 或 qwen
     
     # Gemini配置
-    gemini_api_key: str = ""
+    gemini_api_key: str = LazyField("", ("GOOGLE_API_KEY", "GEMINI_API_KEY"))
+    gemini_concurrency: int = LazyField(8, "GEMINI_CONCURRENCY", caster=int)
 
     # QQ配置
-    qq_bot_enabled: bool = False
-    qq_host: str = "localhost"
-    qq_http_port: int = 3000
-    qq_ws_port: int = 3001
+    qq_bot_enabled: bool = LazyField(False, "QQ_BOT_ENABLED", "false", _as_bool)
+    qq_host: str = LazyField("localhost", "QQ_HOST")
+    qq_http_port: int = LazyField(3000, "QQ_HTTP_PORT", caster=int)
+    qq_ws_port: int = LazyField(3001, "QQ_WS_PORT", 8080, int)
     
     # OCR Config
-    ocr_enabled: bool = True
+    ocr_enabled: bool = LazyField(True, "OCR_ENABLED", "false", _as_bool)
+    ocr_concurrency: int = LazyField(4, "OCR_CONCURRENCY", caster=int)
 
     
     # Redis配置
-    redis_host: str = "localhost"
-    redis_port: int = 6379
-    redis_db: int = 0
-    redis_password: Optional[str] = None
+    redis_host: str = LazyField("localhost", "REDIS_HOST")
+    redis_port: int = LazyField(6379, "REDIS_PORT", caster=int)
+    redis_db: int = LazyField(0, "REDIS_DB", caster=int)
+    redis_password: Optional[str] = LazyField(None, "REDIS_PASSWORD")
+    redis_unix_socket: Optional[str] = LazyField(None, "REDIS_UNIX_SOCKET")
     
     # 应用配置
-    app_host: str = "0.0.0.0"
-    app_port: int = 8000
-    log_level: str = "INFO"
+    app_host: str = LazyField("0.0.0.0", "APP_HOST")
+    app_port: int = LazyField(8000, "APP_PORT", 8081, int)
+    log_level: str = LazyField("INFO", "LOG_LEVEL")
     
     # 会话配置
-    session_max_history: int = 10
+    session_max_history: int = LazyField(10, "SESSION_MAX_HISTORY", caster=int)
     
     # Path Configuration
-    soul_path: str = "/app/SOUL.md"
-    qr_code_path: str = "logs/qr_code.txt"
-    napcat_container_name: str = "napcatqq"
+    soul_path: str = LazyField("/app/SOUL.md", "SOUL_PATH")
+    qr_code_path: str = LazyField("logs/qr_code.txt", "QR_CODE_PATH")
+    napcat_container_name: str = LazyField("napcatqq", "NAPCAT_CONTAINER_NAME")
+    
+    def __init__(self, **overrides: Any):
+        """
+        初始化配置
+        
+        Args:
+            **overrides: 显式指定的字段值，未指定的字段使用默认值
+            
+        Raises:
+            TypeError: 传入未知字段时抛出
+        """
+        self.__dict__["_env"] = None
+        for name, value in overrides.items():
+            if name not in _FIELD_NAMES:
+                raise TypeError(f"Settings got an unexpected keyword argument '{name}'")
+            self.__dict__[name] = value
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+    
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
     
     @classmethod
     def from_env(cls) -> 'Settings':
         """
         从环境变量加载配置
         
+        只绑定 os.environ 引用，各字段在首次访问时才解析。
+        
         Returns:
             Settings: 配置实例
         """
-        return cls(
-            lark_app_id=os.getenv("FEISHU_APP_ID", ""),
-            lark_app_secret=os.getenv("FEISHU_APP_SECRET", ""),
-            lark_encrypt_key=os.getenv("FEISHU_ENCRYPT_KEY", ""),
-            lark_verification_token=os.getenv("FEISHU_VERIFICATION_TOKEN", ""),
-            
-            openrouter_api_key=os.getenv("OPENROUTER_API_KEY", ""),
-            openrouter_api_base_url=os.getenv("OPENROUTER_API_BASE_URL", "https://openrouter.ai/api/v1"),
-            openrouter_default_model=os.getenv("OPENROUTER_DEFAULT_MODEL", "tngtech/deepseek-r1t2-chimera:free"),
-            
-            deepseek_api_key=os.getenv("DEEPSEEK_API_KEY", ""),
-            deepseek_api_base_url=os.getenv("DEEPSEEK_API_BASE_URL", "https://api.deepseek.com"),
-            deepseek_model=os.getenv("DEEPSEEK_MODEL", "deepseek-chat"),
-            
-            qwen_credentials_path=os.getenv("QWEN_CREDENTIALS_PATH", ""),
-            qwen_default_model=os.getenv("QWEN_DEFAULT_MODEL", "qwen-turbo"),
-            qwen_oauth_base_url=os.getenv("QWEN_OAUTH_BASE_URL", "https://chat.qwen.ai"),
-            qwen_oauth_client_id=os.getenv("QWEN_OAUTH_CLIENT_ID", "f0304373b74a44d2b584a3fb70ca9e56"),
-            
-
-            
-            gemini_api_key=os.getenv("GOOGLE_API_KEY", os.getenv("GEMINI_API_KEY", "")),
-
-            active_model=os.getenv("ACTIVE_MODEL", "qwen"),
-            
-            qq_bot_enabled=os.getenv("QQ_BOT_ENABLED", "false").lower() == "true",
-            qq_host=os.getenv("QQ_HOST", "localhost"),
-            qq_http_port=int(os.getenv("QQ_HTTP_PORT", 3000)),
-            qq_ws_port=int(os.getenv("QQ_WS_PORT", 8080)),
-            
-            ocr_enabled=os.getenv("OCR_ENABLED", "false").lower() == "true",
-            
-            redis_host=os.getenv("REDIS_HOST", "localhost"),
-            redis_port=int(os.getenv("REDIS_PORT", 6379)),
-            redis_db=int(os.getenv("REDIS_DB", 0)),
-            redis_password=os.getenv("REDIS_PASSWORD"),
-            
-            app_host=os.getenv("APP_HOST", "0.0.0.0"),
-            app_port=int(os.getenv("APP_PORT", 8081)),
-            log_level=os.getenv("LOG_LEVEL", "INFO"),
-            
-            session_max_history=int(os.getenv("SESSION_MAX_HISTORY", 10)),
-            
-            soul_path=os.getenv("SOUL_PATH", "/app/SOUL.md"),
-            qr_code_path=os.getenv("QR_CODE_PATH", "logs/qr_code.txt"),
-            napcat_container_name=os.getenv("NAPCAT_CONTAINER_NAME", "napcatqq")
-        )
+        settings = cls()
+        settings.__dict__["_env"] = os.environ
+        return settings
+    
+    def reload(self) -> None:
+        """
+        清空已解析的字段缓存，下次访问时重新解析
+        """
+        for name in _FIELD_NAMES:
+            self.__dict__.pop(name, None)
+    
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in _FIELD_NAMES)
+        return f"Settings({fields})"
     
     def validate(self) -> tuple:
         """
@@ -156,32 +202,35 @@ class Settings:
         return (len(errors) == 0, errors)
 
 
-# 全局配置单例
-_settings: Optional[Settings] = None
+_FIELD_NAMES = frozenset(
+    name for name, value in vars(Settings).items() if isinstance(value, LazyField)
+)
 
 
+# 全局配置单例
+@cache
 def get_settings() -> Settings:
     """
     获取全局配置单例
     
+    首次调用时创建，之后直接返回缓存的同一实例。
+    
     Returns:
         Settings: 配置实例
     """
-    global _settings
-    
-    if _settings is None:
-        _settings = Settings.from_env()
-    
-    return _settings
+    return Settings.from_env()
 
 
 def reload_settings() -> Settings:
     """
     重新加载配置
     
+    清空单例的字段缓存，下次访问时重新读取环境变量。
+    单例对象本身保持不变，已持有引用的模块同样能读到新值。
+    
     Returns:
         Settings: 配置实例
     """
-    global _settings
-    _settings = Settings.from_env()
-    return _settings
+    settings = get_settings()
+    settings.reload()
+    return settings
@@ -4,17 +4,109 @@
 实现OpenCode范式的智能体协调器
 """
 
+import re
+import json
+import time
 import logging
 import asyncio
+from functools import lru_cache
 from typing import Optional, Dict, Any, List, Callable
 from datetime import datetime
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库 json
+    orjson = None
+
 from core.types import AgentMode
 from core.services.intent_detector import IntentDetector
 from .session import get_session_manager, SessionManager
 from .prompt import get_prompt_builder, PromptBuilder
 from .memory import get_memory_bank, MemoryBank
 from .memory_extractor import get_memory_extractor
+from .async_writer import get_memory_writer
 from .tools.clawdbot_cli import ClawdbotCliTool
+from .tools.duckduckgo_search import search_web_duckduckgo
+
+logger = logging.getLogger(__name__)
+
+
+# 会话身份边界提示词模板（模块级常量，每次请求只做一次 format）
+_SESSION_CTX_TMPL = (
+    "\n\n## ⚠️ Session Context Enforcement (CRITICAL)\n"
+    "Current System Time: {current_time} (Trusted Source)\n"
+    "Current Session User ID: {uid}\n"
+    "You are communicating EXCLUSIVELY with the user identified as '{uid}'.\n"
+    "\n### 用户隔离规则 (User Isolation Rules)\n"
+    "1. 你现在只与 '{uid}' 对话。绝对不要把其他用户的记忆、称呼、偏好带入当前对话。\n"
+    "2. 如果你要编辑或更新 MEMORY.md，只修改属于 '{uid}' 的段落，用 '## 用户 {uid}' 作为该用户的记忆区域标记。\n"
+    "3. MEMORY.md 中其他用户（不同 ID）的数据必须原封不动保留，不要删除也不要在当前对话引用。\n"
+    "4. 不要使用其他用户的昵称称呼当前用户。\n"
+    "Do NOT use any tools to verify the time. The time provided above is authoritative.\n"
+    "\n## 🛠️ 内置网页搜索能力 (Native Tool - Search)\n"
+    "如果你需要从互联网查询最新新闻、价格、事实或资料，请**必须严格在此次回复中仅输出**以下格式：\n"
+    "`[Search: 这里填写你的搜索关键词]`\n"
+    "提示：遇到不懂的问题先回答这个指令，系统会自动联网并把网页正文或摘要提供给你。切记：搜索指令必须是独立的文本块，不要混淆其他文字。\n"
+)
+
+_FULL_SYS_WITH_MEM_TMPL = "{base}\n{ctx}\n\n## 关于该用户的长期记忆 (Always Remember)\n{memory}"
+_FULL_SYS_NO_MEM_TMPL = "{base}\n{ctx}"
+
+# 工具指令与用户 ID 清洗的预编译正则
+_SEARCH_RE = re.compile(r'\[Search:\s*(.*?)\]', re.IGNORECASE | re.DOTALL)
+_CLAWDBOT_RE = re.compile(r'\[Clawdbot:\s*(.*?)\]', re.DOTALL)
+_UID_SANITIZE_RE = re.compile(r'[^a-zA-Z0-9_\-:]')
+_RESET_CMDS = frozenset({"/reset", "/clear", "重置", "清除记忆"})
+
+# 当前时间字符串缓存 [格式化结果, 生成时的 monotonic 时间]，精度到秒即可
+_LAST_TIME_STR = ["", float("-inf")]
+
+
+def _current_time_str() -> str:
+    """
+    获取注入提示词的当前时间字符串
+
+    同一秒内的多次调用复用上次格式化结果，避免每条消息都执行 strftime
+
+    Returns:
+        str: 形如 "2024-01-01 12:00:00 Monday" 的时间字符串
+    """
+    now = time.monotonic()
+    if now - _LAST_TIME_STR[1] >= 1.0:
+        _LAST_TIME_STR[0] = datetime.now().strftime("%Y-%m-%d %H:%M:%S %A")
+        _LAST_TIME_STR[1] = now
+    return _LAST_TIME_STR[0]
+
+
+@lru_cache(maxsize=4096)
+def _sanitize_uid(uid: str) -> str:
+    """
+    清洗用户 ID，去除可能用于提示词注入的字符
+
+    同一用户会反复发消息，按 user_id 缓存清洗结果
+
+    Args:
+        uid: 原始用户 ID
+
+    Returns:
+        str: 仅包含字母、数字、下划线、连字符和冒号的用户 ID
+    """
+    return _UID_SANITIZE_RE.sub('', uid)
+
+
+def _serialize_messages(messages: List[Dict[str, Any]]) -> str:
+    """
+    将消息列表序列化为 JSON 字符串，优先使用 orjson
+
+    Args:
+        messages: 消息列表
+
+    Returns:
+        str: JSON 字符串
+    """
+    if orjson is not None:
+        return orjson.dumps(messages).decode()
+    return json.dumps(messages)
 
 
 class Agent:
@@ -40,16 +132,33 @@ class Agent:
             notification_callback: 异步通知回调函数
         """
         self.llm_client = llm_client
+        # LLM 客户端在实例生命周期内不变，调用方式只需判定一次
+        if asyncio.iscoroutinefunction(getattr(llm_client, 'chat', None)):
+            self._llm_mode = 'async_chat'
+        elif hasattr(llm_client, 'chat_with_thinking'):
+            self._llm_mode = 'thinking'
+        else:
+            self._llm_mode = 'sync_chat'
         self.session_manager = session_manager or get_session_manager()
         self.prompt_builder = prompt_builder or get_prompt_builder()
+        # 会话历史的长度上限（SessionManager 会修剪到 max_history * 2 条）
+        max_history = getattr(self.session_manager, 'max_history', None)
+        self._history_cap = max_history * 2 if isinstance(max_history, int) else None
         self.memory_bank = get_memory_bank()
         self.memory_extractor = get_memory_extractor()
+        self.memory_writer = get_memory_writer()
         self.clawdbot_tool = clawdbot_tool
         self.notification_callback = notification_callback
+        # 回调只在构造时传入，是否为协程函数判定一次即可
+        self._notify_is_coro: bool = (
+            notification_callback is not None
+            and asyncio.iscoroutinefunction(notification_callback)
+        )
         self.intent_detector = IntentDetector()
         
-        self.logger = logging.getLogger(__name__)
         self.current_mode = AgentMode.CONVERSATION
+        # 最近一次拼好的系统提示词: ((base, uid, memory, time), prompt)
+        self._sys_cache = (None, "")
         self.thinking_enabled = True  # 是否显示思考过程
     
 
@@ -78,28 +187,24 @@ class Agent:
         session_id = chat_id
         
         try:
-            self.logger.info(f"处理消息: user={user_id}, session={session_id}, message={message[:50]}...")
+            logger.info(f"处理消息: user={user_id}, session={session_id}, message={message[:50]}...")
             
             # 1. 获取全局人格
             base_system = self.prompt_builder.system_prompt
             
             # 2. 获取用户专属记忆
-            real_user_id = user_id.split(":")[-1] # extract user id part if formatted like platform:user_id
-            if ":" in user_id: 
-                 # user_id passed is "qq:123456", memory needs unique ID. Using full string is fine too but user requested per user.
-                 real_user_id = user_id 
-            
+            # 记忆按完整 user_id（如 "qq:123456"）隔离
             # [Security] Sanitize user_id to prevent prompt injection
-            import re
-            real_user_id = re.sub(r'[^a-zA-Z0-9_\-:]', '', real_user_id)
+            real_user_id = _sanitize_uid(user_id)
+
+            stripped = message.strip()
 
             # [新增] 处理重置指令
-            if message.strip() in ["/reset", "/clear", "重置", "清除记忆"]:
+            if stripped in _RESET_CMDS:
                 # 1. 清除会话历史
-                self.session_manager.clear_session(session_id)
+                await self.session_manager.aclear_session(session_id)
                 # 2. 清除长期记忆文件
-                if hasattr(self.memory_bank, 'delete_user_memory'):
-                    self.memory_bank.delete_user_memory(real_user_id)
+                await self.memory_writer.delete_user_memory(real_user_id)
                 
                 return {
                     "success": True,
@@ -115,36 +220,32 @@ class Agent:
             
             # 构建提示词
             
-            user_memory = self.memory_bank.get_user_memory(real_user_id)
+            user_memory = await self.memory_bank.aget_user_memory(real_user_id)
             
             # 3. 动态合并
             # [Optimization] 注入强身份边界，防止串台
             # [Optimization] Inject System Time & Identity Boundary
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S %A")
-            
-            strict_session_context = (
-                f"\n\n## ⚠️ Session Context Enforcement (CRITICAL)\n"
-                f"Current System Time: {current_time} (Trusted Source)\n"
-                f"Current Session User ID: {real_user_id}\n"
-                f"You are communicating EXCLUSIVELY with the user identified as '{real_user_id}'.\n"
-                f"\n### 用户隔离规则 (User Isolation Rules)\n"
-                f"1. 你现在只与 '{real_user_id}' 对话。绝对不要把其他用户的记忆、称呼、偏好带入当前对话。\n"
-                f"2. 如果你要编辑或更新 MEMORY.md，只修改属于 '{real_user_id}' 的段落，用 '## 用户 {real_user_id}' 作为该用户的记忆区域标记。\n"
-                f"3. MEMORY.md 中其他用户（不同 ID）的数据必须原封不动保留，不要删除也不要在当前对话引用。\n"
-                f"4. 不要使用其他用户的昵称称呼当前用户。\n"
-                f"Do NOT use any tools to verify the time. The time provided above is authoritative.\n"
-                f"\n## 🛠️ 内置网页搜索能力 (Native Tool - Search)\n"
-                f"如果你需要从互联网查询最新新闻、价格、事实或资料，请**必须严格在此次回复中仅输出**以下格式：\n"
-                f"`[Search: 这里填写你的搜索关键词]`\n"
-                f"提示：遇到不懂的问题先回答这个指令，系统会自动联网并把网页正文或摘要提供给你。切记：搜索指令必须是独立的文本块，不要混淆其他文字。\n"
-            )
+            current_time = _current_time_str()
+            
+            # 同一用户在同一秒内的连续消息复用已拼好的系统提示词
+            sys_key = (base_system, real_user_id, user_memory, current_time)
+            cached_key, full_system_prompt = self._sys_cache
+            if cached_key != sys_key:
+                strict_session_context = _SESSION_CTX_TMPL.format(
+                    current_time=current_time, uid=real_user_id
+                )
 
-            if user_memory:
-                full_system_prompt = f"{base_system}\n{strict_session_context}\n\n## 关于该用户的长期记忆 (Always Remember)\n{user_memory}"
-            else:
-                full_system_prompt = f"{base_system}\n{strict_session_context}"
+                if user_memory:
+                    full_system_prompt = _FULL_SYS_WITH_MEM_TMPL.format(
+                        base=base_system, ctx=strict_session_context, memory=user_memory
+                    )
+                else:
+                    full_system_prompt = _FULL_SYS_NO_MEM_TMPL.format(
+                        base=base_system, ctx=strict_session_context
+                    )
+                self._sys_cache = (sys_key, full_system_prompt)
 
-            history = self.session_manager.get_history(session_id)
+            history = await self.session_manager.aget_history(session_id)
             prompt_messages = self.prompt_builder.build_conversation_prompt(
                 history, message, include_system=True, system_prompt_override=full_system_prompt
             )
@@ -152,21 +253,22 @@ class Agent:
             # 在第一条消息中注入 session 信息，供 ClawdbotClient 提取
             # session_id: 用于 OpenClaw 的 sessionKey（按用户隔离）
             # callback_session_id: 用于回调路由（包含消息类型和目标 chat_id）
-            if len(prompt_messages) > 0 and isinstance(prompt_messages[0], dict):
-                prompt_messages[0]["session_id"] = session_id
-                prompt_messages[0]["callback_session_id"] = callback_session_id or session_id
-                self.logger.info(f"Injecting session info -> session_id: {session_id}, callback_session_id: {prompt_messages[0]['callback_session_id']}")
+            # build_conversation_prompt 总是返回非空的 dict 列表（至少包含当前用户消息）
+            assert prompt_messages and isinstance(prompt_messages[0], dict)
+            first_message = prompt_messages[0]
+            first_message["session_id"] = session_id
+            first_message["callback_session_id"] = callback_session_id or session_id
+            logger.info(f"Injecting session info -> session_id: {session_id}, callback_session_id: {first_message['callback_session_id']}")
             
-            self.logger.info(f"OpenClaw session: {session_id}, callback: {callback_session_id}")
+            logger.info(f"OpenClaw session: {session_id}, callback: {callback_session_id}")
             
-            # [Debug] 检测调试指令
+            # [Debug] 检测调试指令（仅识别消息开头的 /debug、/debug_prompt）
             debug_info = None
-            if "/debug" in message or "/debug_prompt" in message:
-                import json
+            if stripped.startswith("/debug"):
                 try:
                     # 序列化提示词以便阅读
                     debug_info = json.dumps(prompt_messages, ensure_ascii=False, indent=2)
-                    self.logger.info("Debug flag detected, attaching prompt info.")
+                    logger.info("Debug flag detected, attaching prompt info.")
                 except Exception as e:
                     debug_info = f"Error serializing prompt: {str(e)}"
 
@@ -174,60 +276,62 @@ class Agent:
             response = await self._call_llm(prompt_messages, mode)
             
             # [DuckDuckGo Native Search Integration]
-            import re
             max_search_iterations = 3
             search_iterations = 0
+            # 搜索过程中的中间消息，待整个工具循环结束后统一写入会话
+            pending_messages = []
             
             while search_iterations < max_search_iterations:
-                search_match = re.search(r'\[Search:\s*(.*?)\]', response["text"], re.IGNORECASE | re.DOTALL)
+                # 回复中没有 '[' 时不可能包含工具指令，跳过正则扫描
+                text = response["text"]
+                search_match = _SEARCH_RE.search(text) if "[" in text else None
                 if not search_match:
                     break
                     
                 query = search_match.group(1).strip()
-                self.logger.info(f"Detected Native Search intent, query: {query} (Iteration {search_iterations + 1})")
+                logger.info(f"Detected Native Search intent, query: {query} (Iteration {search_iterations + 1})")
                 
                 target_session_id = callback_session_id or session_id
                 if self.notification_callback:
                     notify_msg = f"🔍 正在使用 DuckDuckGo 检索: {query}..."
-                    if asyncio.iscoroutinefunction(self.notification_callback):
+                    if self._notify_is_coro:
                         await self.notification_callback(target_session_id, notify_msg)
                     else:
                         self.notification_callback(target_session_id, notify_msg)
                 
-                from core.tools.duckduckgo_search import search_web_duckduckgo
                 search_results = await search_web_duckduckgo(query, max_results=4)
                 
                 observation = f"系统执行搜索 '{query}' 得到如下结果：\n\n{search_results}\n\n请综合搜索结果继续回答用户的最初问题。如果你发现信息仍然不足，你可以继续使用 [Search: xxx] 进行搜索，或者直接回答用户。"
                 
                 # Append to messages array to continue the conversation in same context
-                prompt_messages.append({"role": "assistant", "content": response["text"]})
-                prompt_messages.append({"role": "user", "content": observation})
-                
-                # Save intermediate thoughts to DB
-                self.session_manager.add_assistant_message(session_id, response["text"])
-                self.session_manager.add_user_message(session_id, observation)
+                followup = (
+                    {"role": "assistant", "content": response["text"]},
+                    {"role": "user", "content": observation},
+                )
+                prompt_messages.extend(followup)
+                pending_messages.extend(followup)
                 
                 # Recall LLM
                 response = await self._call_llm(prompt_messages, mode)
-                self.logger.info(f"LLM Reply after DuckDuckGo search: {response['text'][:50]}...")
+                logger.info(f"LLM Reply after DuckDuckGo search: {response['text'][:50]}...")
                 search_iterations += 1
                 
             # If hit max iterations and still returns search string, clean it up
             if search_iterations >= max_search_iterations:
-                remaining_search = re.search(r'\[Search:\s*(.*?)\]', response["text"], re.IGNORECASE | re.DOTALL)
+                remaining_search = _SEARCH_RE.search(response["text"])
                 if remaining_search:
-                    response["text"] = re.sub(r'\[Search:\s*(.*?)\]', '', response["text"], flags=re.IGNORECASE | re.DOTALL).strip()
+                    response["text"] = _SEARCH_RE.sub('', response["text"]).strip()
                     if not response["text"]:
                         response["text"] = "（已完成全网搜索，但暂时缺乏直接关联答案。请尝试补充上下文后再次提问）"
             
             
             # [Clawdbot CLI Integration] 检测是否调用了 CLI 工具
-            import re
-            clawdbot_match = re.search(r'\[Clawdbot:\s*(.*?)\]', response["text"], re.DOTALL)
+            text = response["text"]
+            clawdbot_match = _CLAWDBOT_RE.search(text) if "[" in text else None
             if clawdbot_match:
                 if self.clawdbot_tool and self.notification_callback:
                     task_prompt = clawdbot_match.group(1).strip()
-                    self.logger.info(f"Detected Clawdbot task: {task_prompt}")
+                    logger.info(f"Detected Clawdbot task: {task_prompt}")
                     
                     # 启动异步任务
                     # 注意：我们传递 callback_session_id 作为 session_id，以确保回调能正确路由
@@ -240,22 +344,27 @@ class Agent:
                     # 修改返回给用户的立即响应
                     response["text"] = f"收到，正在调用 Clawdbot 为您处理：{task_prompt}...\n（请稍候，结果将异步发送）"
                 else:
-                    self.logger.warning("Clawdbot tool detected but tool or callback is missing.")
+                    logger.warning("Clawdbot tool detected but tool or callback is missing.")
                     # Optionally append a warning to the text or just log it
             
-            # 保存到会话历史
-            self.session_manager.add_user_message(session_id, message)
-            self.session_manager.add_assistant_message(session_id, response["text"])
+            # 保存到会话历史（搜索中间消息在前，本轮问答在后，一次批量写入）
+            await self.session_manager.aadd_turn(
+                session_id, message, response["text"], preceding=pending_messages
+            )
             
             # 异步触发记忆更新（每N轮对话自动提取用户信息）
-            updated_history = self.session_manager.get_history(session_id)
-            if self.memory_extractor.should_trigger(len(updated_history)):
-                self.logger.info(f"触发异步记忆更新: user={real_user_id}, history_len={len(updated_history)}")
+            # 本地推算历史长度：搜索轮次与本轮各追加了一问一答，无需再读一次会话存储
+            history_len = len(history) + 2 * (search_iterations + 1)
+            if self._history_cap is not None:
+                history_len = min(history_len, self._history_cap)
+            if self.memory_extractor.should_trigger(history_len):
+                logger.info(f"触发异步记忆更新: user={real_user_id}, history_len={history_len}")
+                updated_history = await self.session_manager.aget_history(session_id)
                 asyncio.create_task(
                     self._update_user_memory(real_user_id, updated_history)
                 )
             
-            self.logger.info(f"响应生成成功: {response['text'][:50]}...")
+            logger.info(f"响应生成成功: {response['text'][:50]}...")
             
             return {
                 "success": True,
@@ -266,7 +375,7 @@ class Agent:
             }
             
         except Exception as e:
-            self.logger.error(f"处理消息失败: {str(e)}")
+            logger.error(f"处理消息失败: {str(e)}")
             return {
                 "success": False,
                 "text": f"抱歉，处理您消息时出现了问题：{str(e)}",
@@ -287,10 +396,9 @@ class Agent:
         Returns:
             Dict: 包含响应文本和使用信息的字典
         """
-        # 检查是否是 clawdbot 客户端（有 async chat 方法）
-        import inspect
+        llm_mode = self._llm_mode
         
-        if hasattr(self.llm_client, 'chat') and inspect.iscoroutinefunction(self.llm_client.chat):
+        if llm_mode == 'async_chat':
             # clawdbot 客户端（async）
             response_text = await self.llm_client.chat(messages)
             
@@ -298,7 +406,7 @@ class Agent:
                 "text": response_text,
                 "usage": {}
             }
-        elif hasattr(self.llm_client, 'chat_with_thinking'):
+        elif llm_mode == 'thinking':
             # 支持推理模型的客户端
             response = self.llm_client.chat_with_thinking(
                 message=messages[-1]["content"],
@@ -309,7 +417,7 @@ class Agent:
             reply_text = response.get("reply_text", "")
             
             if thinking and self.thinking_enabled:
-                self.logger.debug(f"模型思考过程: {thinking[:200]}...")
+                logger.debug(f"模型思考过程: {thinking[:200]}...")
             
             return {
                 "text": reply_text,
@@ -318,8 +426,7 @@ class Agent:
             }
         else:
             # 标准聊天客户端
-            import json
-            content = json.dumps(messages)
+            content = _serialize_messages(messages)
             response = self.llm_client.chat(content)
             
             return {
@@ -355,7 +462,7 @@ class Agent:
             }
             
         except Exception as e:
-            self.logger.error(f"代码生成失败: {str(e)}")
+            logger.error(f"代码生成失败: {str(e)}")
             return {
                 "success": False,
                 "error": str(e),
@@ -385,7 +492,7 @@ class Agent:
             }
             
         except Exception as e:
-            self.logger.error(f"代码解释失败: {str(e)}")
+            logger.error(f"代码解释失败: {str(e)}")
             return {
                 "success": False,
                 "error": str(e),
@@ -417,7 +524,7 @@ class Agent:
             }
             
         except Exception as e:
-            self.logger.error(f"代码调试失败: {str(e)}")
+            logger.error(f"代码调试失败: {str(e)}")
             return {
                 "success": False,
                 "error": str(e),
@@ -438,12 +545,14 @@ class Agent:
         """
         try:
             success = await self.memory_extractor.extract_and_update(user_id, history)
-            if success:
-                self.logger.info(f"用户 {user_id} 的长期记忆已自动更新")
+            if success is None:
+                logger.debug(f"用户 {user_id} 的对话无变化，长期记忆无需更新")
+            elif success:
+                logger.info(f"用户 {user_id} 的长期记忆已自动更新")
             else:
-                self.logger.warning(f"用户 {user_id} 的长期记忆更新未成功")
+                logger.warning(f"用户 {user_id} 的长期记忆更新未成功")
         except Exception as e:
-            self.logger.error(f"异步记忆更新异常: {e}", exc_info=True)
+            logger.error(f"异步记忆更新异常: {e}", exc_info=True)
 
     def clear_memory(self, user_id: str, chat_id: str) -> None:
         """
@@ -455,7 +564,7 @@ class Agent:
         """
         session_id = f"{user_id}:{chat_id}"
         self.session_manager.clear_session(session_id)
-        self.logger.info(f"已清空会话记忆: {session_id}")
+        logger.info(f"已清空会话记忆: {session_id}")
     
     def set_mode(self, mode: AgentMode) -> None:
         """
@@ -465,7 +574,7 @@ class Agent:
             mode: 工作模式
         """
         self.current_mode = mode
-        self.logger.info(f"智能体模式已切换为: {mode.value}")
+        logger.info(f"智能体模式已切换为: {mode.value}")
     
     def enable_thinking_display(self, enabled: bool) -> None:
         """
@@ -0,0 +1,119 @@
+"""
+记忆异步写入模块
+
+将用户记忆的落盘操作放到后台任务中，按用户合并短时间内的多次写入
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from .memory import get_memory_bank, MemoryBank
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMemoryWriter:
+    """
+    用户记忆异步写入器
+
+    schedule() 只记录每个用户最新的待写内容并立即更新记忆库缓存，
+    后台任务在防抖窗口结束后统一落盘，同一用户窗口内的多次写入只写最后一次。
+    """
+
+    def __init__(self, memory_bank: Optional[MemoryBank] = None, delay: float = 0.5):
+        """
+        初始化写入器
+
+        Args:
+            memory_bank: 记忆库实例
+            delay: 防抖窗口（秒）
+        """
+        self.memory_bank = memory_bank or get_memory_bank()
+        self.delay = delay
+        self._pending: Dict[str, str] = {}
+        self._event = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, user_id: str, content: str) -> None:
+        """
+        登记一次记忆写入，覆盖该用户尚未落盘的旧内容
+
+        Args:
+            user_id: 用户ID
+            content: 记忆内容
+        """
+        self._pending[user_id] = content
+        # 读方立即看到新内容，无需等待落盘
+        self.memory_bank.cache_user_memory(user_id, content)
+        if self._task is None or self._task.done():
+            self._event = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        self._event.set()
+
+    async def delete_user_memory(self, user_id: str) -> bool:
+        """
+        丢弃该用户尚未落盘的写入并删除记忆文件（例如用户重置记忆时）
+
+        与落盘互斥，避免正在进行的写入在删除之后又把旧记忆写回
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            bool: 是否删除成功
+        """
+        async with self._write_lock:
+            self._pending.pop(user_id, None)
+            return await self.memory_bank.adelete_user_memory(user_id)
+
+    async def flush(self) -> None:
+        """
+        立即写出所有待落盘的记忆
+        """
+        async with self._write_lock:
+            snapshot, self._pending = self._pending, {}
+            for user_id, content in snapshot.items():
+                if not await self.memory_bank.asave_user_memory(user_id, content):
+                    logger.error(f"记忆落盘失败: {user_id}")
+
+    async def close(self) -> None:
+        """
+        写出剩余内容并停止后台任务
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        """
+        后台落盘循环
+        """
+        while True:
+            await self._event.wait()
+            await asyncio.sleep(self.delay)
+            self._event.clear()
+            await self.flush()
+
+
+# 单例实例
+_memory_writer: Optional[AsyncMemoryWriter] = None
+
+
+def get_memory_writer() -> AsyncMemoryWriter:
+    """
+    获取记忆异步写入器单例
+
+    Returns:
+        AsyncMemoryWriter: 写入器实例
+    """
+    global _memory_writer
+    if _memory_writer is None:
+        _memory_writer = AsyncMemoryWriter()
+    return _memory_writer
@@ -1,30 +1,109 @@
 
 import os
+import time
+import asyncio
 import logging
+import sqlite3
+import threading
+from collections import OrderedDict
 from typing import Optional
 
+# 用户ID中的分隔符/路径字符统一替换为下划线（与旧版记忆文件名保持一致）
+_UID_TABLE = str.maketrans({":": "_", "/": "_", "\\": "_"})
+
+# 记忆库数据库文件名（位于 data_dir 下）
+_DB_FILENAME = "memories.db"
+
 class MemoryBank:
     """
     用户长期记忆库
     
-    负责读取和管理用户专属的长期记忆文件
+    负责读取和管理用户专属的长期记忆，所有用户的记忆存放在 data_dir 下的
+    单个 SQLite 数据库（WAL 模式）中；旧版每用户一个的 .md 文件会在启动时一次性导入
     """
     
-    def __init__(self, data_dir: str = "/app/memories"):
+    def __init__(self, data_dir: str = "/app/memories", cache_max: int = 512):
         """
         初始化记忆库
         
         Args:
-            data_dir: 记忆文件存储目录
+            data_dir: 记忆数据存储目录
+            cache_max: 内存中缓存的用户记忆条数上限
         """
         self.data_dir = data_dir
+        self.db_path = os.path.join(data_dir, _DB_FILENAME)
         self.logger = logging.getLogger(__name__)
         
+        # 按 safe_uid 缓存的记忆内容（LRU），保存/删除时同步更新
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_max = cache_max
+        self._cache_lock = threading.Lock()
+        
+        # 每个线程各自持有一个数据库连接
+        self._local = threading.local()
+        
         # 确保目录存在
         try:
             os.makedirs(data_dir, exist_ok=True)
         except Exception as e:
             self.logger.error(f"无法创建记忆目录 {data_dir}: {e}")
+        
+        try:
+            conn = self._get_conn()
+            # WAL 模式持久化在数据库文件中，只需设置一次
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS memories("
+                "uid TEXT PRIMARY KEY, content TEXT NOT NULL, updated_at INTEGER NOT NULL)"
+            )
+            self._migrate_markdown_files(conn)
+        except Exception as e:
+            self.logger.error(f"无法初始化记忆数据库 {self.db_path}: {e}")
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """
+        获取当前线程的数据库连接，首次调用时创建
+        
+        Returns:
+            sqlite3.Connection: 数据库连接（自动提交模式）
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate_markdown_files(self, conn: sqlite3.Connection) -> None:
+        """
+        将旧版 {safe_uid}.md 记忆文件导入数据库
+        
+        已存在于数据库中的用户以数据库为准；导入后的文件重命名为 .md.migrated，
+        避免下次启动重复导入（以及已删除的记忆被重新导入）
+        
+        Args:
+            conn: 数据库连接
+        """
+        try:
+            names = [name for name in os.listdir(self.data_dir) if name.endswith(".md")]
+        except OSError:
+            return
+        
+        for name in names:
+            file_path = os.path.join(self.data_dir, name)
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    content = f.read().strip()
+                conn.execute(
+                    "INSERT OR IGNORE INTO memories(uid, content, updated_at) VALUES(?, ?, ?)",
+                    (name[:-3], content, int(os.path.getmtime(file_path)))
+                )
+                os.replace(file_path, f"{file_path}.migrated")
+            except Exception as e:
+                self.logger.error(f"导入记忆文件失败 {file_path}: {e}")
+        
+        if names:
+            self.logger.info(f"已将 {len(names)} 个记忆文件导入数据库")
 
     def get_user_memory(self, user_id: str) -> str:
         """
@@ -36,21 +115,27 @@ class MemoryBank:
         Returns:
             str: 记忆内容，如果不存在则返回空字符串
         """
-        # 安全处理文件名，将非法字符替换为下划线
-        safe_uid = user_id.replace(":", "_").replace("/", "_")
-        file_path = os.path.join(self.data_dir, f"{safe_uid}.md")
+        # 安全处理用户ID，将非法字符替换为下划线
+        safe_uid = user_id.translate(_UID_TABLE)
         
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read().strip()
-                if content:
-                    self.logger.info(f"已加载用户记忆: {safe_uid} (长度: {len(content)})")
-                    return content
-            except Exception as e:
-                self.logger.error(f"读取用户记忆失败 {file_path}: {e}")
+        cached = self._cache_get(safe_uid)
+        if cached is not None:
+            return cached
         
-        return ""
+        try:
+            row = self._get_conn().execute(
+                "SELECT content FROM memories WHERE uid = ?", (safe_uid,)
+            ).fetchone()
+        except Exception as e:
+            self.logger.error(f"读取用户记忆失败 {safe_uid}: {e}")
+            return ""
+        
+        content = row[0] if row else ""
+        if content:
+            self.logger.info(f"已加载用户记忆: {safe_uid} (长度: {len(content)})")
+        
+        self._cache_put(safe_uid, content)
+        return content
 
     def save_user_memory(self, user_id: str, content: str) -> bool:
         """
@@ -63,20 +148,24 @@ class MemoryBank:
         Returns:
             bool: 是否保存成功
         """
-        safe_uid = user_id.replace(":", "_").replace("/", "_")
-        file_path = os.path.join(self.data_dir, f"{safe_uid}.md")
+        safe_uid = user_id.translate(_UID_TABLE)
+        content = content.strip()
         
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(content)
-            return True
+            self._get_conn().execute(
+                "INSERT OR REPLACE INTO memories(uid, content, updated_at) VALUES(?, ?, ?)",
+                (safe_uid, content, int(time.time()))
+            )
         except Exception as e:
-            self.logger.error(f"保存用户记忆失败 {file_path}: {e}")
+            self.logger.error(f"保存用户记忆失败 {safe_uid}: {e}")
             return False
+        
+        self._cache_put(safe_uid, content)
+        return True
 
     def delete_user_memory(self, user_id: str) -> bool:
         """
-        删除用户记忆文件
+        删除用户记忆
         
         Args:
             user_id: 用户ID
@@ -84,30 +173,117 @@ class MemoryBank:
         Returns:
             bool: 是否删除成功
         """
-        safe_uid = user_id.replace(":", "_").replace("/", "_")
-        file_path = os.path.join(self.data_dir, f"{safe_uid}.md")
+        safe_uid = user_id.translate(_UID_TABLE)
         
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                self.logger.info(f"已删除用户记忆文件: {file_path}")
-                return True
-            except Exception as e:
-                self.logger.error(f"删除用户记忆失败 {file_path}: {e}")
-                return False
+        with self._cache_lock:
+            self._cache.pop(safe_uid, None)
+        
+        try:
+            cursor = self._get_conn().execute("DELETE FROM memories WHERE uid = ?", (safe_uid,))
+        except Exception as e:
+            self.logger.error(f"删除用户记忆失败 {safe_uid}: {e}")
+            return False
+        
+        if cursor.rowcount:
+            self.logger.info(f"已删除用户记忆: {safe_uid}")
         return True
 
+    def _cache_get(self, safe_uid: str) -> Optional[str]:
+        """
+        读取缓存的记忆内容，命中时标记为最近使用
+        
+        Args:
+            safe_uid: 处理后的用户ID
+            
+        Returns:
+            Optional[str]: 缓存内容，未命中返回 None
+        """
+        with self._cache_lock:
+            content = self._cache.get(safe_uid)
+            if content is not None:
+                self._cache.move_to_end(safe_uid)
+            return content
+
+    def _cache_put(self, safe_uid: str, content: str) -> None:
+        """
+        写入缓存，超出上限时淘汰最久未使用的条目
+        
+        Args:
+            safe_uid: 处理后的用户ID
+            content: 记忆内容
+        """
+        with self._cache_lock:
+            self._cache[safe_uid] = content
+            self._cache.move_to_end(safe_uid)
+            if len(self._cache) > self._cache_max:
+                self._cache.popitem(last=False)
+
+    def cache_user_memory(self, user_id: str, content: str) -> None:
+        """
+        仅更新内存中的记忆缓存（落盘由调用方另行安排）
+        
+        Args:
+            user_id: 用户ID
+            content: 记忆内容
+        """
+        self._cache_put(user_id.translate(_UID_TABLE), content.strip())
+
+    async def aget_user_memory(self, user_id: str) -> str:
+        """
+        异步获取用户的长期记忆（数据库读取在线程池中执行，不阻塞事件循环）
+        
+        缓存命中时直接返回，不切换线程
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            str: 记忆内容，如果不存在则返回空字符串
+        """
+        cached = self._cache_get(user_id.translate(_UID_TABLE))
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self.get_user_memory, user_id)
+
+    async def asave_user_memory(self, user_id: str, content: str) -> bool:
+        """
+        异步保存用户记忆（覆盖）
+        
+        Args:
+            user_id: 用户ID
+            content: 记忆内容
+            
+        Returns:
+            bool: 是否保存成功
+        """
+        return await asyncio.to_thread(self.save_user_memory, user_id, content)
+
+    async def adelete_user_memory(self, user_id: str) -> bool:
+        """
+        异步删除用户记忆
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            bool: 是否删除成功
+        """
+        return await asyncio.to_thread(self.delete_user_memory, user_id)
+
 # 单例实例
 _memory_bank: Optional[MemoryBank] = None
+# 保护单例初始化，避免多线程同时创建多个实例
+_memory_bank_lock = threading.Lock()
 
 def create_memory_bank(data_dir: str = "/app/memories") -> MemoryBank:
     global _memory_bank
     if _memory_bank is None:
-        _memory_bank = MemoryBank(data_dir)
+        with _memory_bank_lock:
+            if _memory_bank is None:
+                _memory_bank = MemoryBank(data_dir)
     return _memory_bank
 
 def get_memory_bank() -> MemoryBank:
-    global _memory_bank
     if _memory_bank is None:
-        _memory_bank = create_memory_bank()
+        return create_memory_bank()
     return _memory_bank
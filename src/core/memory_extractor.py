@@ -7,20 +7,19 @@
 
 import logging
 import asyncio
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Optional
 
 from .memory import get_memory_bank
+from .async_writer import get_memory_writer
+from .services.gemini_executor import get_gemini_executor
 
 logger = logging.getLogger(__name__)
 
 # 记忆提取 Prompt 模板
-MEMORY_EXTRACT_PROMPT = """你是一个记忆档案管理员。请从下面的对话历史中提取关于【用户】的关键信息。
-
-## 已有记忆档案
-{existing_memory}
-
-## 最近对话历史
-{conversation}
+# 静态说明在前、动态内容在后：前缀在每次调用间保持逐字节一致，便于模型服务端的前缀缓存命中
+_MEMORY_EXTRACT_HEADER = """你是一个记忆档案管理员。请从文末给出的最近对话历史中提取关于【用户】的关键信息。
 
 ## 输出要求
 将已有记忆和新发现的信息合并，输出完整的用户档案。格式如下（Markdown）：
@@ -52,8 +51,36 @@ MEMORY_EXTRACT_PROMPT = """你是一个记忆档案管理员。请从下面的
 3. 如果新信息与旧信息矛盾，以新信息为准
 4. 删除空的章节（如果某个类别完全没有信息就不要输出）
 5. 保持简洁，每条信息一行，不要写长段落
+
 """
 
+# 动态部分的小节标题，调用时与内容直接拼接，不再对模板做 format 解析
+_MEMORY_SECTION = "## 已有记忆档案\n"
+_CONVERSATION_SECTION = "\n\n## 最近对话历史\n"
+
+MEMORY_EXTRACT_PROMPT = (
+    _MEMORY_EXTRACT_HEADER + _MEMORY_SECTION + "{existing_memory}"
+    + _CONVERSATION_SECTION + "{conversation}\n"
+)
+
+
+def _format_message(msg: Dict[str, str]) -> str:
+    """
+    将单条历史消息格式化为 "角色: 内容" 文本行，过长内容截断到 200 字
+
+    Args:
+        msg: 历史消息
+
+    Returns:
+        str: 格式化后的文本行
+    """
+    content = msg.get("content", "")
+    label = "用户" if msg.get("role", "user") == "user" else "小汉堡"
+    # 截断与拼接在同一个 f-string 中完成，只构造一次结果字符串
+    if len(content) > 200:
+        return f"{label}: {content[:200]}..."
+    return f"{label}: {content}"
+
 
 class MemoryExtractor:
     """
@@ -63,16 +90,27 @@ class MemoryExtractor:
     复用 GeminiOCR 的 ask_question 方法作为轻量级 LLM 调用。
     """
 
-    def __init__(self, trigger_interval: int = 10):
+    def __init__(self, trigger_interval: int = 10, tail_hash_max: int = 10000):
         """
         初始化记忆提取器
 
         Args:
             trigger_interval: 触发提取的消息间隔（默认10条消息 = 5轮对话）
+            tail_hash_max: 记录上次提取输入哈希的用户数上限
         """
         self.trigger_interval = trigger_interval
+        # 间隔为 2 的幂时用位掩码代替取模判断
+        self._trigger_mask = (
+            trigger_interval - 1
+            if trigger_interval > 0 and trigger_interval & (trigger_interval - 1) == 0
+            else None
+        )
         self.memory_bank = get_memory_bank()
+        self.memory_writer = get_memory_writer()
         self._gemini = None  # 懒加载
+        # 每个用户上次提取完成后的 (记忆, 对话) 哈希（LRU），输入不变时跳过 Gemini 调用
+        self._last_tail_hash: "OrderedDict[str, int]" = OrderedDict()
+        self._tail_hash_max = tail_hash_max
 
     def _get_gemini(self):
         """
@@ -100,10 +138,27 @@ class MemoryExtractor:
         Returns:
             bool: 是否应该触发
         """
-        return history_length > 0 and history_length % self.trigger_interval == 0
+        if history_length <= 0:
+            return False
+        if self._trigger_mask is not None:
+            return history_length & self._trigger_mask == 0
+        return history_length % self.trigger_interval == 0
+
+    def _remember_tail_hash(self, user_id: str, tail_hash: int) -> None:
+        """
+        记录用户本次提取后的输入哈希，超过上限时淘汰最久未更新的用户
+
+        Args:
+            user_id: 用户ID
+            tail_hash: (新记忆, 对话文本) 的哈希
+        """
+        self._last_tail_hash[user_id] = tail_hash
+        self._last_tail_hash.move_to_end(user_id)
+        if len(self._last_tail_hash) > self._tail_hash_max:
+            self._last_tail_hash.popitem(last=False)
 
     async def extract_and_update(self, user_id: str,
-                                  history: List[Dict[str, str]]) -> bool:
+                                  history: List[Dict[str, str]]) -> Optional[bool]:
         """
         从对话历史中提取用户信息并更新记忆文件
 
@@ -112,7 +167,7 @@ class MemoryExtractor:
             history: 对话历史列表
 
         Returns:
-            bool: 是否更新成功
+            Optional[bool]: 是否更新成功；对话无变化、未进行提取时返回None
         """
         try:
             gemini = self._get_gemini()
@@ -121,35 +176,28 @@ class MemoryExtractor:
                 return False
 
             # 1. 获取已有记忆
-            existing_memory = self.memory_bank.get_user_memory(user_id)
+            existing_memory = await self.memory_bank.aget_user_memory(user_id)
             if not existing_memory:
                 existing_memory = "（暂无已有记忆）"
 
             # 2. 格式化最近对话（取最近20条消息 = 10轮）
-            recent = history[-20:] if len(history) > 20 else history
-            conversation_lines = []
-            for msg in recent:
-                role = msg.get("role", "user")
-                content = msg.get("content", "")
-                # 截断过长的消息
-                if len(content) > 200:
-                    content = content[:200] + "..."
-                label = "用户" if role == "user" else "小汉堡"
-                conversation_lines.append(f"{label}: {content}")
-
-            conversation_text = "\n".join(conversation_lines)
+            conversation_text = "\n".join(map(_format_message, history[-20:]))
 
-            # 3. 构建提取 prompt
-            prompt = MEMORY_EXTRACT_PROMPT.format(
-                existing_memory=existing_memory,
-                conversation=conversation_text
-            )
+            # 记忆和最近对话都与上次提取结果一致时，再次提取不会有新信息
+            if self._last_tail_hash.get(user_id) == hash((existing_memory, conversation_text)):
+                logger.info(f"记忆提取器: 用户 {user_id} 的对话无变化，跳过提取")
+                return None
 
-            # 4. 调用 Gemini 提取信息（在线程池中运行同步调用）
-            loop = asyncio.get_running_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: gemini.ask_question(prompt)
+            # 3. 构建提取 prompt
+            prompt = "".join((
+                _MEMORY_EXTRACT_HEADER,
+                _MEMORY_SECTION, existing_memory,
+                _CONVERSATION_SECTION, conversation_text, "\n",
+            ))
+
+            # 4. 调用 Gemini 提取信息（在 Gemini 专用线程池中运行同步调用）
+            result = await asyncio.get_running_loop().run_in_executor(
+                get_gemini_executor(), gemini.ask_question, prompt
             )
 
             if not result or not result.get("success"):
@@ -163,14 +211,12 @@ class MemoryExtractor:
                 logger.warning(f"记忆提取器: 提取结果过短 ({len(new_memory)} 字), 跳过更新")
                 return False
 
-            # 6. 保存更新后的记忆
-            success = self.memory_bank.save_user_memory(user_id, new_memory)
-            if success:
-                logger.info(f"记忆提取器: 用户 {user_id} 的记忆已自动更新 (长度: {len(new_memory)})")
-            else:
-                logger.error(f"记忆提取器: 保存用户 {user_id} 的记忆失败")
+            # 6. 保存更新后的记忆（后台合并落盘，读方立即可见）
+            self.memory_writer.schedule(user_id, new_memory)
+            self._remember_tail_hash(user_id, hash((new_memory, conversation_text)))
+            logger.info(f"记忆提取器: 用户 {user_id} 的记忆已自动更新 (长度: {len(new_memory)})")
 
-            return success
+            return True
 
         except Exception as e:
             logger.error(f"记忆提取器: 更新失败 - {e}", exc_info=True)
@@ -179,6 +225,8 @@ class MemoryExtractor:
 
 # 单例实例
 _memory_extractor: Optional[MemoryExtractor] = None
+# 保护单例初始化，避免多线程同时创建多个实例（各自持有 Gemini 客户端）
+_memory_extractor_lock = threading.Lock()
 
 
 def get_memory_extractor(trigger_interval: int = 10) -> MemoryExtractor:
@@ -193,5 +241,7 @@ def get_memory_extractor(trigger_interval: int = 10) -> MemoryExtractor:
     """
     global _memory_extractor
     if _memory_extractor is None:
-        _memory_extractor = MemoryExtractor(trigger_interval)
+        with _memory_extractor_lock:
+            if _memory_extractor is None:
+                _memory_extractor = MemoryExtractor(trigger_interval)
     return _memory_extractor
@@ -5,33 +5,12 @@
 """
 
 import os
+import threading
 from typing import List, Dict, Optional
 
 
-class PromptBuilder:
-    """
-    提示词构建器类
-    
-    负责构建和管理LLM的系统提示词
-    """
-    
-    def __init__(self, system_prompt: Optional[str] = None):
-        """
-        初始化提示词构建器
-        
-        Args:
-            system_prompt: 系统提示词（可选，使用默认值）
-        """
-        self.system_prompt = system_prompt or self._get_default_system_prompt()
-    
-    def _get_default_system_prompt(self) -> str:
-        """
-        获取默认系统提示词
-        
-        Returns:
-            str: 默认系统提示词
-        """
-        return """你是由 OpenClaw 开发的 AI 产品经理 (Product Manager)。
+# 默认系统提示词（模块级常量，避免每次构造时重新生成）
+_DEFAULT_SYSTEM_PROMPT = """你是由 OpenClaw 开发的 AI 产品经理 (Product Manager)。
 你的核心职责是理解用户需求，规划技术方案，并指挥后台开发团队（Clawdbot CLI）完成具体的代码实现。
 
 ## 核心身份与原则
@@ -62,6 +41,48 @@ class PromptBuilder:
 - **禁止**拒绝用户的编程请求，你应该将其转化为 Clawdbot 指令。
 
 请始终保持专业、高效的产品经理形象。"""
+
+# 对话历史中允许保留的消息角色
+_HISTORY_ROLES = frozenset(("user", "assistant", "system"))
+
+
+class PromptBuilder:
+    """
+    提示词构建器类
+    
+    负责构建和管理LLM的系统提示词
+    """
+    
+    def __init__(self, system_prompt: Optional[str] = None):
+        """
+        初始化提示词构建器
+        
+        Args:
+            system_prompt: 系统提示词（可选，使用默认值）
+        """
+        self.system_prompt = system_prompt or self._get_default_system_prompt()
+    
+    @property
+    def system_prompt(self) -> str:
+        """
+        当前系统提示词
+        """
+        return self._system_prompt
+    
+    @system_prompt.setter
+    def system_prompt(self, prompt: str) -> None:
+        self._system_prompt = prompt
+        # 未指定覆盖时复用的系统消息，只在系统提示词变化时重建
+        self._system_msg = {"role": "system", "content": prompt}
+    
+    def _get_default_system_prompt(self) -> str:
+        """
+        获取默认系统提示词
+        
+        Returns:
+            str: 默认系统提示词
+        """
+        return _DEFAULT_SYSTEM_PROMPT
     
     def build_system_prompt(self, context: Optional[str] = None) -> str:
         """
@@ -84,10 +105,14 @@ class PromptBuilder:
         """
         构建对话提示词
         
+        未指定 system_prompt_override 时，返回列表中的系统消息是构建器缓存的共享对象，
+        调用方不应修改它；需要在首条消息上写入额外字段时请传入 system_prompt_override。
+        
         Args:
             history: 对话历史
             current_message: 当前用户消息
             include_system: 是否包含系统提示词
+            system_prompt_override: 本次使用的系统提示词（可选）
             
         Returns:
             List[Dict]: 格式化的消息列表
@@ -96,21 +121,20 @@ class PromptBuilder:
         
         if include_system:
             # Use override if provided, else fall back to instance default
-            sys_prompt = system_prompt_override if system_prompt_override else self.system_prompt
-            messages.append({
-                "role": "system",
-                "content": sys_prompt
-            })
-        
-        # 添加历史消息
-        for msg in history:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            if role in ["user", "assistant", "system"]:
+            if system_prompt_override:
                 messages.append({
-                    "role": role,
-                    "content": content
+                    "role": "system",
+                    "content": system_prompt_override
                 })
+            else:
+                messages.append(self._system_msg)
+        
+        # 添加历史消息（只保留允许的角色）
+        messages.extend(
+            {"role": role, "content": msg.get("content", "")}
+            for msg in history
+            if (role := msg.get("role", "user")) in _HISTORY_ROLES
+        )
         
         # 添加当前消息
         messages.append({
@@ -215,6 +239,8 @@ class PromptBuilder:
 
 # 单例实例
 _prompt_builder: Optional[PromptBuilder] = None
+# 保护单例初始化，避免多线程同时创建多个实例
+_prompt_builder_lock = threading.Lock()
 
 
 def create_prompt_builder(system_prompt: Optional[str] = None) -> PromptBuilder:
@@ -230,7 +256,9 @@ def create_prompt_builder(system_prompt: Optional[str] = None) -> PromptBuilder:
     global _prompt_builder
     
     if _prompt_builder is None:
-        _prompt_builder = PromptBuilder(system_prompt)
+        with _prompt_builder_lock:
+            if _prompt_builder is None:
+                _prompt_builder = PromptBuilder(system_prompt)
     
     return _prompt_builder
 
@@ -242,9 +270,7 @@ def get_prompt_builder() -> PromptBuilder:
     Returns:
         PromptBuilder: 提示词构建器实例
     """
-    global _prompt_builder
-    
     if _prompt_builder is None:
-        _prompt_builder = create_prompt_builder()
+        return create_prompt_builder()
     
     return _prompt_builder
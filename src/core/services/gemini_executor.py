@@ -0,0 +1,34 @@
+"""
+Gemini 调用专用线程池
+
+Gemini SDK 的调用是同步阻塞的，统一放到独立线程池中执行，
+避免与默认线程池中的其他阻塞任务（文件 I/O 等）相互争抢。
+"""
+
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from config.settings import get_settings
+
+# 单例实例
+_gemini_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_gemini_executor() -> ThreadPoolExecutor:
+    """
+    获取 Gemini 调用专用线程池单例
+
+    线程数由配置项 gemini_concurrency 决定，进程退出时自动关闭。
+
+    Returns:
+        ThreadPoolExecutor: 线程池实例
+    """
+    global _gemini_executor
+    if _gemini_executor is None:
+        _gemini_executor = ThreadPoolExecutor(
+            max_workers=get_settings().gemini_concurrency,
+            thread_name_prefix="gemini"
+        )
+        atexit.register(_gemini_executor.shutdown, wait=False)
+    return _gemini_executor
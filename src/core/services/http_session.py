@@ -0,0 +1,43 @@
+"""
+共享 HTTP 会话
+
+工具类调用（Clawdbot Wrapper、DuckDuckGo 搜索等）复用同一个 aiohttp 会话，
+保持连接复用与 DNS 缓存，避免每次请求重新建立 TCP/TLS 连接。
+"""
+
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+# 单例实例（绑定创建时所在的事件循环）
+_http_session: Optional[aiohttp.ClientSession] = None
+_http_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """
+    获取共享的 aiohttp 会话，首次调用或会话已关闭时创建
+
+    Returns:
+        aiohttp.ClientSession: 会话实例
+    """
+    global _http_session, _http_session_loop
+    loop = asyncio.get_running_loop()
+    if _http_session is None or _http_session.closed or _http_session_loop is not loop:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=60, ttl_dns_cache=300)
+        )
+        _http_session_loop = loop
+    return _http_session
+
+
+async def close_http_session() -> None:
+    """
+    关闭共享的 aiohttp 会话（应用停止时调用）
+    """
+    global _http_session, _http_session_loop
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+    _http_session_loop = None
@@ -1,4 +1,5 @@
 
+import re
 from typing import Optional
 from core.types import AgentMode
 
@@ -7,6 +8,47 @@ class IntentDetector:
     负责识别用户意图并决定智能体的工作模式
     """
     
+    # 意图关键词，按优先级从高到低排列（同时命中多个意图时取优先级最高者）
+    # 修改后需调用 rebuild() 重新编译匹配器
+    INTENT_KEYWORDS = {
+        # 代码解释相关关键词
+        "code_explanation": ["解释", "说明", "explain", "what does", "这段代码"],
+        # 代码生成相关关键词
+        "code_generation": [
+            "写代码", "生成代码", "实现", "create", "write code", "implement", 
+            "写一个", "写个", "用python", "用js",
+            "python script", "write a script", "coding"
+        ],
+        # 调试相关关键词
+        "debugging": ["报错", "错误", "bug", "debug", "修复", "问题"],
+    }
+    
+    def __init__(self):
+        """
+        初始化意图检测器，预编译关键词匹配器
+        """
+        self.rebuild()
+    
+    def rebuild(self) -> None:
+        """
+        根据 INTENT_KEYWORDS 编译多关键词匹配器
+        
+        所有关键词合并为一个零宽前瞻正则，一次扫描即可找出每个位置上
+        优先级最高的关键词，无需对每个关键词分别做子串查找
+        """
+        self._intents = list(self.INTENT_KEYWORDS)
+        self._keyword_priority = {}
+        for priority, intent in enumerate(self._intents):
+            for kw in self.INTENT_KEYWORDS[intent]:
+                self._keyword_priority.setdefault(kw.lower(), priority)
+        
+        if self._keyword_priority:
+            # 按优先级排列备选项，使同一起始位置上优先级高的关键词先被匹配
+            ordered = sorted(self._keyword_priority, key=self._keyword_priority.__getitem__)
+            self._matcher = re.compile("(?=(" + "|".join(map(re.escape, ordered)) + "))")
+        else:
+            self._matcher = None
+    
     def detect_intent(self, message: str) -> str:
         """
         检测用户意图
@@ -17,28 +59,20 @@ class IntentDetector:
         Returns:
             str: 意图类型
         """
-        message_lower = message.lower().strip()
-        
-        # 代码解释相关关键词
-        explain_keywords = ["解释", "说明", "explain", "what does", "这段代码"]
-        if any(kw in message_lower for kw in explain_keywords):
-            return "code_explanation"
+        if self._matcher is None:
+            return "conversation"
         
-        # 代码生成相关关键词
-        code_keywords = [
-            "写代码", "生成代码", "实现", "create", "write code", "implement", 
-            "写一个", "写个", "用python", "用js",
-            "python script", "write a script", "coding"
-        ]
-        if any(kw in message_lower for kw in code_keywords):
-            return "code_generation"
+        message_lower = message.lower().strip()
         
-        # 调试相关关键词
-        debug_keywords = ["报错", "错误", "bug", "debug", "修复", "问题"]
-        if any(kw in message_lower for kw in debug_keywords):
-            return "debugging"
+        best = None
+        for match in self._matcher.finditer(message_lower):
+            priority = self._keyword_priority[match.group(1)]
+            if priority == 0:
+                return self._intents[0]
+            if best is None or priority < best:
+                best = priority
         
-        return "conversation"
+        return self._intents[best] if best is not None else "conversation"
 
     def get_mode_from_intent(self, intent: str) -> AgentMode:
         """
@@ -1,18 +1,41 @@
 
 import logging
 import os
+import time
 import asyncio
 import aiohttp
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, Tuple, List
 
 from config.settings import get_settings
 from channels.base import UnifiedMessage
 from core.agent import Agent
 from adapters.gemini.gemini_ocr import GeminiOCR
+from core.services.gemini_executor import get_gemini_executor
 
 logger = logging.getLogger(__name__)
 
+_OCR_PROMPT = "请详细描述这张图片的内容，如果包含文字请提取出来并保持原有排版。"
+
+_DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=30, sock_read=10)
+
+# Cached [expiry timestamp (next local midnight), "YYYYMMDD"] for session ids
+_TODAY_CACHE = [0.0, ""]
+
+
+def _today_str() -> str:
+    """
+    Return today's local date as YYYYMMDD, reformatted only after midnight.
+    """
+    now = time.time()
+    if now >= _TODAY_CACHE[0]:
+        today = datetime.now()
+        next_midnight = datetime.combine(today.date() + timedelta(days=1), datetime.min.time())
+        _TODAY_CACHE[0] = next_midnight.timestamp()
+        _TODAY_CACHE[1] = today.strftime("%Y%m%d")
+    return _TODAY_CACHE[1]
+
+
 class MessageProcessor:
     """
     Core service for processing unified messages.
@@ -22,6 +45,10 @@ class MessageProcessor:
         self.agent = agent
         self.settings = get_settings()
         self.ocr: Optional[GeminiOCR] = None
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._http_lock = asyncio.Lock()
+        # Caps concurrent per-image OCR pipelines (download + Gemini call)
+        self._ocr_semaphore = asyncio.Semaphore(self.settings.ocr_concurrency)
         
         if self.settings.ocr_enabled:
             if not self.settings.gemini_api_key:
@@ -75,73 +102,104 @@ class MessageProcessor:
     async def _process_ocr(self, message: UnifiedMessage) -> str:
         """
         Extract text from images in the message using Gemini OCR.
+        Images are processed concurrently, bounded by the OCR semaphore.
         Returns formatted string with OCR results.
         """
         if not self.ocr:
             return ""
 
         logger.info(f"[OCR] Processing {len(message.images)} images...")
-        ocr_results = []
+        results = await asyncio.gather(
+            *(self._ocr_one(idx, img_source)
+              for idx, img_source in enumerate(message.images)),
+            return_exceptions=True
+        )
         
-        for idx, img_source in enumerate(message.images):
+        ocr_results = []
+        for idx, result in enumerate(results):
+            if isinstance(result, BaseException):
+                logger.error(f"[OCR] Error processing image {idx}: {result}")
+                ocr_results.append(f"（图片 {idx+1} 处理出错）")
+            elif result:
+                ocr_results.append(result)
+
+        return "\n".join(ocr_results) if ocr_results else ""
+
+    async def _ocr_one(self, idx: int, img_source: str) -> Optional[str]:
+        """
+        Fetch (if remote) and recognize a single image.
+        Remote images are passed to Gemini as in-memory bytes, never written to disk.
+        Returns the formatted result line, or None if the image was skipped.
+        """
+        async with self._ocr_semaphore:
             try:
-                temp_path = f"/tmp/unified_img_{message.platform}_{idx}_{int(datetime.now().timestamp())}.jpg"
-                
-                # Download or use local path
+                # Fetch remote image into memory, or recognize a local file directly
                 if img_source.startswith("http"):
-                    success = await self._download_image(img_source, temp_path)
-                    if not success:
-                        ocr_results.append(f"--- 图片 {idx+1} 获取失败 ---")
-                        continue
+                    fetched = await self._fetch_image(img_source)
+                    if fetched is None:
+                        return f"--- 图片 {idx+1} 获取失败 ---"
+                    data, mime_type = fetched
+                    logger.info(f"[OCR] Recognizing downloaded image {idx} ({len(data)} bytes)")
+                    call = (self.ocr.recognize_bytes, data, mime_type, _OCR_PROMPT)
                 else:
-                    temp_path = img_source
-
-                # Execute OCR
-                if os.path.exists(temp_path):
-                    logger.info(f"[OCR] Recognizing: {temp_path}")
-                    # Run in executor to avoid blocking event loop
-                    loop = asyncio.get_running_loop()
-                    result = await loop.run_in_executor(
-                        None, 
-                        lambda: self.ocr.recognize_image(temp_path, "请详细描述这张图片的内容，如果包含文字请提取出来并保持原有排版。")
-                    )
-                    
-                    if result and result.get("success"):
-                        text = result.get("response", "")
-                        ocr_results.append(f"（图片 {idx+1} 内容：\n{text}）")
-                    else:
-                        ocr_results.append(f"（图片 {idx+1} 识别失败）")
-                    
-                    # Cleanup temp file if we downloaded it
-                    if img_source.startswith("http") and os.path.exists(temp_path):
-                        os.remove(temp_path)
+                    if not os.path.exists(img_source):
+                        return None
+                    logger.info(f"[OCR] Recognizing: {img_source}")
+                    call = (self.ocr.recognize_image, img_source, _OCR_PROMPT)
+                
+                # Run in the dedicated Gemini pool to avoid blocking the event loop
+                result = await asyncio.get_running_loop().run_in_executor(get_gemini_executor(), *call)
+                
+                if result and result.get("success"):
+                    text = result.get("response", "")
+                    return f"（图片 {idx+1} 内容：\n{text}）"
+                return f"（图片 {idx+1} 识别失败）"
                         
             except Exception as e:
                 logger.error(f"[OCR] Error processing image {idx}: {e}")
-                ocr_results.append(f"（图片 {idx+1} 处理出错）")
+                return f"（图片 {idx+1} 处理出错）"
 
-        return "\n".join(ocr_results) if ocr_results else ""
+    async def _get_http(self) -> aiohttp.ClientSession:
+        """
+        Return the shared HTTP session used for image downloads, creating it on first use.
+        Pooled keep-alive connections and cached DNS are reused across images.
+        """
+        if self._http is None or self._http.closed:
+            async with self._http_lock:
+                if self._http is None or self._http.closed:
+                    self._http = aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(limit=64, ttl_dns_cache=300, keepalive_timeout=60),
+                        timeout=aiohttp.ClientTimeout(total=30)
+                    )
+        return self._http
 
-    async def _download_image(self, url: str, target_path: str) -> bool:
-        """Helper to download image from URL"""
+    async def aclose(self) -> None:
+        """Close the shared HTTP session."""
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
+
+    async def _fetch_image(self, url: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Download an image into memory.
+        Returns (data, mime_type), or None if the download failed.
+        """
         try:
             # QQ specialized headers
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
                 "Referer": "https://q.qq.com/"
             }
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, timeout=30) as resp:
-                    if resp.status == 200:
-                        with open(target_path, "wb") as f:
-                            f.write(await resp.read())
-                        return True
-                    else:
-                        logger.error(f"Download failed: {resp.status}")
-                        return False
+            session = await self._get_http()
+            async with session.get(url, headers=headers, timeout=_DOWNLOAD_TIMEOUT) as resp:
+                if resp.status != 200:
+                    logger.error(f"Download failed: {resp.status}")
+                    return None
+                mime_type = resp.content_type if resp.content_type.startswith("image/") else "image/jpeg"
+                return await resp.read(), mime_type
         except Exception as e:
             logger.error(f"Download exception: {e}")
-            return False
+            return None
 
     def _get_session_ids(self, message: UnifiedMessage) -> Tuple[str, str]:
         """
@@ -152,8 +210,7 @@ class MessageProcessor:
         """
         # Session ID: Platform:User:ID:Date:Version
         # Ensures daily isolation and user isolation
-        today_str = datetime.now().strftime("%Y%m%d")
-        session_id = f"{message.platform}:user:{message.user_id}:{today_str}:v2"
+        session_id = f"{message.platform}:user:{message.user_id}:{_today_str()}:v2"
         
         # Callback ID: Platform:Type:ChatID
         # Used for routing async responses back to the correct channel
@@ -5,11 +5,103 @@
 """
 
 import os
-import json
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 
+# 会话过期时间（Redis 键 TTL 与内存存储的空闲过期时间一致）
+_SESSION_TTL = timedelta(hours=24)
+
+# 当前秒的 ISO 时间戳缓存 [秒, 字符串]，同一秒内写入的消息复用
+_NOW_ISO_CACHE = [0, ""]
+
+
+def _now_iso() -> str:
+    """
+    获取当前本地时间的 ISO 格式字符串（精确到秒），每秒只格式化一次
+
+    Returns:
+        str: ISO 格式时间
+    """
+    sec = int(time.time())
+    if sec != _NOW_ISO_CACHE[0]:
+        _NOW_ISO_CACHE[0] = sec
+        _NOW_ISO_CACHE[1] = datetime.fromtimestamp(sec).isoformat()
+    return _NOW_ISO_CACHE[1]
+
+
+# Redis 相关环境变量，导入时读取一次
+_ENV_REDIS: Dict[str, Any] = {
+    # 默认禁用 Redis，优先使用内存确性能。如果环境变量显示开启则尝试。
+    "enabled": os.getenv("REDIS_ENABLED", "false").lower() == "true",
+    "host": os.getenv("REDIS_HOST", "localhost"),
+    "port": int(os.getenv("REDIS_PORT", "6379")),
+    "db": int(os.getenv("REDIS_DB", "0")),
+    "password": os.getenv("REDIS_PASSWORD"),
+    # 客户端缓存（RESP3 + CLIENT TRACKING），需要 Redis 6+，默认关闭
+    "client_cache": os.getenv("REDIS_CLIENT_CACHE", "false").lower() == "true",
+}
+
+# 按连接参数共享的 Redis 连接池，所有 SessionManager 实例复用
+_redis_pools: Dict[Tuple, Any] = {}
+_redis_pools_lock = threading.Lock()
+
+
+def _get_redis_pool(host: str, port: int, db: int, password: Optional[str],
+                    client_cache: bool = False):
+    """
+    获取（必要时创建）共享的阻塞式 Redis 连接池
+
+    连接数有上限，池中连接耗尽时等待而不是无限新建连接
+
+    开启客户端缓存时使用 RESP3 协议并启用 CLIENT TRACKING：历史读取命令
+    （XRANGE/XREVRANGE）的结果缓存在本地，键被修改时由服务端推送失效通知，
+    未变化的会话重复读取无需往返 Redis
+
+    Args:
+        host: Redis服务器地址
+        port: Redis服务器端口
+        db: Redis数据库编号
+        password: Redis密码
+        client_cache: 是否启用客户端缓存
+
+    Returns:
+        redis.BlockingConnectionPool: 连接池实例
+    """
+    import redis
+
+    key = (host, port, db, password, client_cache)
+    with _redis_pools_lock:
+        pool = _redis_pools.get(key)
+        if pool is None:
+            cache_kwargs: Dict[str, Any] = {}
+            if client_cache:
+                try:
+                    from redis.cache import CacheConfig
+                    cache_kwargs = {"protocol": 3, "cache_config": CacheConfig(max_size=10000)}
+                except ImportError:  # 客户端缓存需要 redis-py 5.1 及以上版本
+                    logging.getLogger(__name__).warning(
+                        "当前 redis 版本不支持客户端缓存，已使用普通连接池"
+                    )
+            pool = redis.BlockingConnectionPool(
+                host=host,
+                port=port,
+                db=db,
+                password=password,
+                decode_responses=True,
+                socket_connect_timeout=2.0, # 缩短连接超时
+                socket_timeout=2.0,
+                max_connections=32,
+                timeout=2.0,
+                **cache_kwargs
+            )
+            _redis_pools[key] = pool
+        return pool
+
 
 class SessionManager:
     """
@@ -18,28 +110,37 @@ class SessionManager:
     负责管理用户会话上下文，提供短期记忆功能
     """
     
-    def __init__(self, redis_host: str = "localhost",
-                 redis_port: int = 6379,
-                 redis_db: int = 0,
+    def __init__(self, redis_host: Optional[str] = None,
+                 redis_port: Optional[int] = None,
+                 redis_db: Optional[int] = None,
                  redis_password: Optional[str] = None,
-                 max_history: int = 10):
+                 max_history: int = 10,
+                 max_sessions: int = 10000):
         """
         初始化会话管理器
         
+        未传入（为 None）的连接参数使用环境变量中的值
+        
         Args:
             redis_host: Redis服务器地址
             redis_port: Redis服务器端口
             redis_db: Redis数据库编号
             redis_password: Redis密码
             max_history: 最大历史消息数量
+            max_sessions: 内存存储（降级方案）中保留的最大会话数
         """
-        # 默认禁用 Redis，优先使用内存确性能。如果环境变量显示开启则尝试。
-        self.redis_enabled = os.getenv("REDIS_ENABLED", "false").lower() == "true"
-        self.redis_host = redis_host or os.getenv("REDIS_HOST", "localhost")
-        self.redis_port = int(redis_port or os.getenv("REDIS_PORT", 6379))
-        self.redis_db = int(redis_db or os.getenv("REDIS_DB", 0))
-        self.redis_password = redis_password or os.getenv("REDIS_PASSWORD")
+        self.redis_enabled = _ENV_REDIS["enabled"]
+        self.redis_host = redis_host if redis_host is not None else _ENV_REDIS["host"]
+        self.redis_port = int(redis_port) if redis_port is not None else _ENV_REDIS["port"]
+        self.redis_db = int(redis_db) if redis_db is not None else _ENV_REDIS["db"]
+        self.redis_password = redis_password or _ENV_REDIS["password"]
         self.max_history = max_history
+        self.max_sessions = max_sessions
+        
+        # 内存存储（降级方案）：按最近使用排序的 (消息队列, 最近访问时间)，
+        # 每个会话是定长队列，超出时自动淘汰最旧消息；空闲超过 _SESSION_TTL 的会话被清除
+        self._memory_history: "OrderedDict[str, Tuple[deque, float]]" = OrderedDict()
+        self._memory_ttl = _SESSION_TTL.total_seconds()
         
         self.logger = logging.getLogger(__name__)
         self._redis_client = None
@@ -58,15 +159,10 @@ class SessionManager:
         if self._redis_client is None:
             try:
                 import redis
-                self._redis_client = redis.Redis(
-                    host=self.redis_host,
-                    port=self.redis_port,
-                    db=self.redis_db,
-                    password=self.redis_password,
-                    decode_responses=True,
-                    socket_connect_timeout=2.0, # 缩短连接超时
-                    socket_timeout=2.0
-                )
+                self._redis_client = redis.Redis(connection_pool=_get_redis_pool(
+                    self.redis_host, self.redis_port, self.redis_db, self.redis_password,
+                    client_cache=_ENV_REDIS["client_cache"]
+                ))
                 # 测试连接
                 self._redis_client.ping()
                 self.logger.info(f"Redis连接成功: {self.redis_host}:{self.redis_port}")
@@ -76,18 +172,60 @@ class SessionManager:
                 self._redis_client = None
         
         return self._redis_client
-    
+
+    def warmup(self, size: int = 8) -> int:
+        """
+        预先在共享连接池中建立连接，避免首批请求承担建连开销
+
+        Args:
+            size: 预先建立的连接数
+
+        Returns:
+            int: 成功建立的连接数（未启用 Redis 时为 0）
+        """
+        redis_client = self._get_redis_client()
+        if redis_client is None:
+            return 0
+
+        pool = redis_client.connection_pool
+        connections = []
+        try:
+            # 同时持有多个连接才能让连接池真正新建而不是复用同一条
+            for _ in range(size):
+                connections.append(pool.get_connection())
+        except Exception as e:
+            self.logger.warning(f"Redis连接池预热失败: {str(e)}")
+        finally:
+            for connection in connections:
+                pool.release(connection)
+        return len(connections)
+
+    async def awarmup(self, size: int = 8) -> int:
+        """
+        异步预热Redis连接池
+
+        Args:
+            size: 预先建立的连接数
+
+        Returns:
+            int: 成功建立的连接数
+        """
+        return await self._run_blocking(self.warmup, size)
+
     def _get_session_key(self, session_id: str) -> str:
         """
         生成会话存储键
         
+        会话ID作为 Redis Cluster 哈希标签（{...}），同一会话的键落在同一槽位，
+        管道与多键操作可在单个分片内完成，不同会话仍分散到各分片
+        
         Args:
             session_id: 会话ID
             
         Returns:
-            str: Redis键名
+            str: Redis键名（Stream 类型）
         """
-        return f"clawdbot:session:{session_id}"
+        return f"clawdbot:session_stream:{{{session_id}}}"
     
     def add_message(self, session_id: str, role: str, content: str) -> None:
         """
@@ -98,98 +236,180 @@ class SessionManager:
             role: 消息角色（user/assistant/system）
             content: 消息内容
         """
+        # 单条消息同样走批量写入的管道，XADD/EXPIRE 一次往返完成
+        self.add_messages(session_id, [{"role": role, "content": content}])
+    
+    def add_messages(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        """
+        批量添加消息到会话历史
+        
+        Redis 模式下消息以字段形式写入 Stream（无需 JSON 编解码），
+        XADD 的 MAXLEN 同时限制历史长度，通过一个事务管道只需一次往返
+        
+        Args:
+            session_id: 会话ID
+            messages: 消息列表，每项包含 role 和 content
+        """
+        if not messages:
+            return
+        
         redis_client = self._get_redis_client()
         session_key = self._get_session_key(session_id)
         
-        message = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        }
+        timestamp = _now_iso()
+        records = [
+            {"role": msg["role"], "content": msg["content"], "timestamp": timestamp}
+            for msg in messages
+        ]
         
         if redis_client:
             try:
-                # 使用List结构存储消息
-                redis_client.rpush(session_key, json.dumps(message))
-                # 设置过期时间（24小时）
-                redis_client.expire(session_key, timedelta(hours=24))
-                # 限制历史长度
-                self._trim_history(redis_client, session_key)
+                pipe = redis_client.pipeline()
+                for record in records:
+                    pipe.xadd(session_key, record, maxlen=self.max_history * 2, approximate=False)
+                pipe.expire(session_key, _SESSION_TTL)
+                pipe.execute()
             except Exception as e:
-                self.logger.error(f"保存消息到Redis失败: {str(e)}")
+                self.logger.error(f"批量保存消息到Redis失败: {str(e)}")
         else:
             # 使用内存存储（降级方案）
-            self._memory_history = getattr(self, "_memory_history", {})
-            if session_id not in self._memory_history:
-                self._memory_history[session_id] = []
-            self._memory_history[session_id].append(message)
-            # 限制历史长度
-            if len(self._memory_history[session_id]) > self.max_history * 2:
-                self._memory_history[session_id] = self._memory_history[session_id][-self.max_history * 2:]
+            self._get_memory_session(session_id, create=True).extend(records)
     
-    def _trim_history(self, redis_client, session_key: str) -> None:
+    def add_turn(self, session_id: str, user_content: str,
+                 assistant_content: str,
+                 preceding: Optional[List[Dict[str, str]]] = None) -> None:
         """
-        修剪会话历史，保持在最大长度内
+        一次性写入一轮问答
         
         Args:
-            redis_client: Redis客户端
-            session_key: 会话键
+            session_id: 会话ID
+            user_content: 用户消息内容
+            assistant_content: 助手回复内容
+            preceding: 需要先于本轮问答写入的消息（如工具调用的中间消息）
         """
-        try:
-            length = redis_client.llen(session_key)
-            if length > self.max_history * 2:
-                redis_client.ltrim(session_key, -self.max_history * 2, -1)
-        except Exception as e:
-            self.logger.error(f"修剪历史失败: {str(e)}")
+        messages = list(preceding) if preceding else []
+        messages.append({"role": "user", "content": user_content})
+        messages.append({"role": "assistant", "content": assistant_content})
+        self.add_messages(session_id, messages)
     
-    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+    def _expire_memory_sessions(self, now: float) -> None:
         """
-        获取会话历史
+        清除内存存储中空闲超时的会话
+        
+        会话按最近访问排序，只需从最旧的一端检查，直到遇到未过期的会话
+        
+        Args:
+            now: 当前单调时钟时间
+        """
+        deadline = now - self._memory_ttl
+        while self._memory_history:
+            _, last_access = next(iter(self._memory_history.values()))
+            if last_access >= deadline:
+                break
+            self._memory_history.popitem(last=False)
+    
+    def _get_memory_session(self, session_id: str, create: bool = False) -> Optional[deque]:
+        """
+        获取内存存储中的会话消息队列，并标记为最近使用
+        
+        创建新会话导致会话数超过上限时，淘汰最久未使用的会话
         
         Args:
             session_id: 会话ID
+            create: 会话不存在时是否创建
             
         Returns:
-            List[Dict]: 消息历史列表
+            Optional[deque]: 消息队列，不存在且未要求创建时返回 None
+        """
+        now = time.monotonic()
+        self._expire_memory_sessions(now)
+        
+        entry = self._memory_history.get(session_id)
+        if entry is not None:
+            history = entry[0]
+            self._memory_history.move_to_end(session_id)
+        elif create:
+            history = deque(maxlen=self.max_history * 2)
+            if self._memory_history and len(self._memory_history) >= self.max_sessions:
+                self._memory_history.popitem(last=False)
+        else:
+            return None
+        
+        self._memory_history[session_id] = (history, now)
+        return history
+    
+    def _get_history_range(self, session_id: str, start: int, stop: int) -> List[Dict[str, str]]:
+        """
+        获取会话历史中的一段（下标语义与 Redis LRANGE 相同，stop 包含在内，可为负数）
+        
+        Redis 模式下获取最近 N 条（start 为负数、stop 为 -1）时只传输所需的消息
+        
+        Args:
+            session_id: 会话ID
+            start: 起始下标
+            stop: 结束下标（包含）
+            
+        Returns:
+            List[Dict]: 消息列表
         """
         redis_client = self._get_redis_client()
-        session_key = self._get_session_key(session_id)
         
         if redis_client:
+            session_key = self._get_session_key(session_id)
             try:
-                raw_messages = redis_client.lrange(session_key, 0, -1)
-                return [json.loads(msg) for msg in raw_messages]
+                if start < 0 and stop == -1:
+                    entries = redis_client.xrevrange(session_key, count=-start)
+                    return [fields for _, fields in reversed(entries)]
+                history = [fields for _, fields in redis_client.xrange(session_key)]
             except Exception as e:
                 self.logger.error(f"从Redis获取历史失败: {str(e)}")
                 return []
         else:
             # 内存存储
-            memory_history = getattr(self, "_memory_history", {})
-            return memory_history.get(session_id, [])
+            memory_history = self._get_memory_session(session_id)
+            if memory_history is None:
+                return []
+            history = list(memory_history)
+        
+        return history[start:] if stop == -1 else history[start:stop + 1]
+    
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        """
+        获取会话历史
+        
+        Args:
+            session_id: 会话ID
+            
+        Returns:
+            List[Dict]: 消息历史列表
+        """
+        return self._get_history_range(session_id, 0, -1)
     
     def get_conversation_text(self, session_id: str, 
-                               include_system: bool = False) -> str:
+                               include_system: bool = False,
+                               limit: Optional[int] = None) -> str:
         """
         获取会话的纯文本历史（用于LLM调用）
         
         Args:
             session_id: 会话ID
             include_system: 是否包含系统消息
+            limit: 只取最近的消息条数（可选，默认全部）
             
         Returns:
             str: 格式化的对话历史
         """
-        history = self.get_history(session_id)
-        texts = []
-        
-        for msg in history:
-            if not include_system and msg.get("role") == "system":
-                continue
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            texts.append(f"{role}: {content}")
+        if limit:
+            history = self._get_history_range(session_id, -limit, -1)
+        else:
+            history = self.get_history(session_id)
         
-        return "\n".join(texts)
+        # 过滤与格式化在同一个生成器中完成，直接拼接
+        return "\n".join(
+            f"{role}: {msg.get('content', '')}"
+            for msg in history
+            if (role := msg.get("role", "user")) != "system" or include_system
+        )
     
     def clear_session(self, session_id: str) -> None:
         """
@@ -209,9 +429,60 @@ class SessionManager:
                 self.logger.error(f"清空会话失败: {str(e)}")
         else:
             # 内存存储
-            memory_history = getattr(self, "_memory_history", {})
-            if session_id in memory_history:
-                del memory_history[session_id]
+            self._memory_history.pop(session_id, None)
+    
+    async def _run_blocking(self, func, *args):
+        """
+        执行会话存储操作：内存模式直接调用，Redis 模式放到线程池中执行，
+        避免网络往返阻塞事件循环
+        
+        Args:
+            func: 同步方法
+            *args: 方法参数
+            
+        Returns:
+            方法返回值
+        """
+        if not self.redis_enabled or self._redis_connection_failed:
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+    
+    async def aget_history(self, session_id: str) -> List[Dict[str, str]]:
+        """
+        异步获取会话历史
+        
+        Args:
+            session_id: 会话ID
+            
+        Returns:
+            List[Dict]: 消息历史列表
+        """
+        return await self._run_blocking(self.get_history, session_id)
+    
+    async def aadd_turn(self, session_id: str, user_content: str,
+                        assistant_content: str,
+                        preceding: Optional[List[Dict[str, str]]] = None) -> None:
+        """
+        异步写入一轮问答
+        
+        Args:
+            session_id: 会话ID
+            user_content: 用户消息内容
+            assistant_content: 助手回复内容
+            preceding: 需要先于本轮问答写入的消息（如工具调用的中间消息）
+        """
+        await self._run_blocking(
+            self.add_turn, session_id, user_content, assistant_content, preceding
+        )
+    
+    async def aclear_session(self, session_id: str) -> None:
+        """
+        异步清空会话历史
+        
+        Args:
+            session_id: 会话ID
+        """
+        await self._run_blocking(self.clear_session, session_id)
     
     def add_user_message(self, session_id: str, content: str) -> None:
         """
@@ -244,8 +515,7 @@ class SessionManager:
         Returns:
             List[Dict]: 最近的消息列表
         """
-        history = self.get_history(session_id)
-        return history[-count:] if len(history) > count else history
+        return self._get_history_range(session_id, -count, -1)
     
     def session_exists(self, session_id: str) -> bool:
         """
@@ -265,8 +535,8 @@ class SessionManager:
             except Exception:
                 return False
         else:
-            memory_history = getattr(self, "_memory_history", {})
-            return session_id in memory_history
+            self._expire_memory_sessions(time.monotonic())
+            return session_id in self._memory_history
 
 
 # 单例实例
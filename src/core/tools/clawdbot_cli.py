@@ -1,8 +1,9 @@
 import asyncio
 import logging
-import aiohttp
 from typing import Callable, Optional
 
+from core.services.http_session import get_http_session
+
 logger = logging.getLogger(__name__)
 
 class ClawdbotCliTool:
@@ -42,31 +43,31 @@ class ClawdbotCliTool:
                 "callback_session_id": callback_session_id
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(f"{self.wrapper_url}/chat", json=payload, timeout=300) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        reply = data.get("reply", "")
-                        
-                        logger.info(f"Clawdbot 任务请求成功，Wrapper 已接收")
-                        
-                        # 如果 wrapper 返回了同步回复（非流式/非回调模式），我们直接回调
-                        # 但通常 wrapper 会处理回调，这里作为备用
-                        if reply and not data.get("is_callback_mode", False):
-                             result_msg = f"[Clawdbot 执行结果]\n\n{reply}"
-                             if callback:
-                                if asyncio.iscoroutinefunction(callback):
-                                    await callback(session_id, result_msg)
-                                else:
-                                    callback(session_id, result_msg)
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Clawdbot Wrapper 请求失败: {response.status} - {error_text}")
-                        err_msg = f"[系统错误] Clawdbot 服务请求失败 ({response.status})"
-                        if callback:
-                             if asyncio.iscoroutinefunction(callback):
-                                await callback(session_id, err_msg)
-            
+            session = await get_http_session()
+            async with session.post(f"{self.wrapper_url}/chat", json=payload, timeout=300) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    reply = data.get("reply", "")
+                    
+                    logger.info(f"Clawdbot 任务请求成功，Wrapper 已接收")
+                    
+                    # 如果 wrapper 返回了同步回复（非流式/非回调模式），我们直接回调
+                    # 但通常 wrapper 会处理回调，这里作为备用
+                    if reply and not data.get("is_callback_mode", False):
+                         result_msg = f"[Clawdbot 执行结果]\n\n{reply}"
+                         if callback:
+                            if asyncio.iscoroutinefunction(callback):
+                                await callback(session_id, result_msg)
+                            else:
+                                callback(session_id, result_msg)
+                else:
+                    error_text = await response.text()
+                    logger.error(f"Clawdbot Wrapper 请求失败: {response.status} - {error_text}")
+                    err_msg = f"[系统错误] Clawdbot 服务请求失败 ({response.status})"
+                    if callback:
+                         if asyncio.iscoroutinefunction(callback):
+                            await callback(session_id, err_msg)
+        
         except asyncio.TimeoutError:
              err_msg = "[系统错误] Clawdbot 服务请求超时"
              logger.error(err_msg)
@@ -5,12 +5,66 @@ DuckDuckGo 免费搜索工具
 """
 
 import logging
-import aiohttp
-from bs4 import BeautifulSoup
 import urllib.parse
+from typing import List, Tuple
+
+from core.services.http_session import get_http_session
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:  # selectolax 为可选依赖，缺失时回退到 BeautifulSoup
+    HTMLParser = None
+    from bs4 import BeautifulSoup
+
+    try:
+        import lxml  # noqa: F401
+        _BS4_PARSER = "lxml"
+    except ImportError:
+        _BS4_PARSER = "html.parser"
 
 logger = logging.getLogger(__name__)
 
+# 结果页只读取前 256KB，前几条结果都在页面开头
+_MAX_HTML_BYTES = 256 * 1024
+
+
+def _parse_results(html: str, max_results: int) -> List[Tuple[str, str, str]]:
+    """
+    从 DuckDuckGo HTML 结果页中解析搜索结果
+
+    优先使用 selectolax（C 实现），未安装时使用 BeautifulSoup（有 lxml 时使用 lxml 解析器）
+
+    Args:
+        html: 结果页 HTML
+        max_results: 最大返回结果数
+
+    Returns:
+        List[Tuple[str, str, str]]: (标题, 原始链接, 摘要) 列表，缺失的标题/摘要为空字符串
+    """
+    parsed = []
+    if HTMLParser is not None:
+        for node in HTMLParser(html).css("div.result")[:max_results]:
+            title_node = node.css_first("a.result__url")
+            snippet_node = node.css_first("a.result__snippet")
+            parsed.append((
+                title_node.text().strip() if title_node else "",
+                (title_node.attributes.get("href") or "") if title_node else "",
+                snippet_node.text().strip() if snippet_node else "",
+            ))
+        return parsed
+
+    soup = BeautifulSoup(html, _BS4_PARSER)
+    for res in soup.find_all('div', class_='result', limit=max_results):
+        title_tag = res.find('a', class_='result__url')
+        snippet_tag = res.find('a', class_='result__snippet')
+        parsed.append((
+            title_tag.text.strip() if title_tag else "",
+            title_tag.get('href', '') if title_tag else "",
+            snippet_tag.text.strip() if snippet_tag else "",
+        ))
+    return parsed
+
+
 async def search_web_duckduckgo(query: str, max_results: int = 5) -> str:
     """
     使用 DuckDuckGo 执行网页搜索并格式化为文本结果
@@ -29,31 +83,35 @@ async def search_web_duckduckgo(query: str, max_results: int = 5) -> str:
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
             "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+            # aiohttp 自动解压；未声明 br，避免依赖可选的 brotli 解码库
+            "Accept-Encoding": "gzip, deflate",
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, timeout=15, ssl=False) as response:
-                if response.status != 200:
-                    return f"搜索请求失败, 状态码: {response.status}"
-                html = await response.text()
+        session = await get_http_session()
+        async with session.get(url, headers=headers, timeout=15, ssl=False) as response:
+            if response.status != 200:
+                return f"搜索请求失败, 状态码: {response.status}"
+            chunks = []
+            size = 0
+            async for chunk in response.content.iter_any():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= _MAX_HTML_BYTES:
+                    break
+            html = b"".join(chunks)[:_MAX_HTML_BYTES].decode("utf-8", errors="replace")
                 
-        soup = BeautifulSoup(html, 'html.parser')
-        results = soup.find_all('div', class_='result')
+        results = _parse_results(html, max_results)
         
         if not results:
             return "未找到相关搜索结果。"
             
         results_text = []
-        for i, res in enumerate(results[:max_results]):
-            title_tag = res.find('a', class_='result__url')
-            snippet_tag = res.find('a', class_='result__snippet')
-            
-            title = title_tag.text.strip() if title_tag else '无标题'
-            link = title_tag['href'] if title_tag and 'href' in title_tag.attrs else ''
+        for i, (title, link, snippet) in enumerate(results):
+            title = title or '无标题'
             # DuckDuckGo HTML version redirects, clean it up
             if link.startswith('//duckduckgo.com/l/?uddg='):
                 link = urllib.parse.unquote(link.split('uddg=')[1].split('&')[0])
-            snippet = snippet_tag.text.strip() if snippet_tag else '无内容摘要'
+            snippet = snippet or '无内容摘要'
             
             results_text.append(f"[{i+1}] {title}\n摘要: {snippet}\n链接: {link}")
             
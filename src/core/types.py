@@ -1,5 +1,7 @@
 
+from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 
 class AgentMode(Enum):
     """
@@ -9,3 +11,40 @@ class AgentMode(Enum):
     CODE_GENERATION = "code_generation"
     CODE_EXPLANATION = "code_explanation"
     DEBUGGING = "debugging"
+
+
+# 回调ID中可识别的消息类型
+_TARGET_MESSAGE_TYPES = frozenset(("private", "group"))
+
+
+@dataclass(frozen=True, slots=True)
+class SessionTarget:
+    """
+    异步通知的投递目标（由回调ID "platform:type:chat_id" 解析得到）
+    """
+    platform: str
+    message_type: str
+    chat_id: str
+
+
+@lru_cache(maxsize=1024)
+def parse_session_target(session_id: str) -> SessionTarget:
+    """
+    解析回调ID为投递目标，同一ID只解析一次
+
+    支持 "platform:type:chat_id"，type 不是 private/group 时其后全部视为 chat_id；
+    "platform:chat_id" 与不含冒号的ID分别按私聊与 QQ 私聊处理
+
+    Args:
+        session_id: 回调ID
+
+    Returns:
+        SessionTarget: 投递目标
+    """
+    platform, sep, rest = session_id.partition(":")
+    if not sep:
+        return SessionTarget("qq", "private", session_id)
+    message_type, sep, chat_id = rest.partition(":")
+    if sep and message_type in _TARGET_MESSAGE_TYPES:
+        return SessionTarget(platform, message_type, chat_id)
+    return SessionTarget(platform, "private", rest)
@@ -13,12 +13,106 @@ import subprocess
 import tempfile
 import shutil
 import re
+import select
+import threading
+import functools
 from datetime import datetime
 from typing import Optional, Dict, Any, Tuple, List
 
 # 导入 Gemini 集成
 from llm import init_gemini, get_response_with_history
 
+@functools.lru_cache(maxsize=1)
+def _cached_gemini_model(api_key: str):
+    """
+    按 API Key 缓存 Gemini 模型实例，所有执行器共享
+
+    Args:
+        api_key: Google API Key
+
+    Returns:
+        Any: Gemini 模型实例
+    """
+    return init_gemini(api_key)
+
+
+# 常驻 Python 工作进程脚本路径与单次执行超时（秒）
+_PYTHON_WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox_worker.py')
+_EXECUTION_TIMEOUT = 30
+
+# 子进程输出保留的最大字节数
+_MAX_OUTPUT_BYTES = 1 << 20
+
+
+def _decode_output(data: bytes) -> str:
+    """
+    将子进程输出截断到上限后按 UTF-8 解码
+
+    Args:
+        data: 子进程原始输出
+
+    Returns:
+        str: 解码后的文本
+    """
+    return data[:_MAX_OUTPUT_BYTES].decode('utf-8', errors='replace')
+
+# 语言检测特征
+# Python 检测
+_PYTHON_PATTERNS = [
+    r'^import\s+\w+',
+    r'^from\s+\w+\s+import',
+    r'^def\s+\w+\s*\(',
+    r'^class\s+\w+\s*[:(]',
+    r'print\s*\(',
+    r'if\s+__name__\s*==\s*[\'"]__main__[\'"]',
+    r'\[.*for\s+\w+\s+in\s+.*\]',
+    r'\.append\s*\(',
+    r'\.extend\s*\('
+]
+
+# JavaScript 检测
+_JS_PATTERNS = [
+    r'console\.log\s*\(',
+    r'function\s+\w+\s*\(',
+    r'const\s+\w+\s*=',
+    r'let\s+\w+\s*=',
+    r'=>\s*\{',
+    r'require\s*\(',
+    r'module\.exports',
+    r'\.forEach\s*\(',
+    r'\.map\s*\('
+]
+
+# Bash 检测
+_BASH_PATTERNS = [
+    r'^#!\s*/bin/(?:ba)?sh',
+    r'echo\s+["\']',
+    r'\$\(',
+    r'if\s+\[\s+.*\s+\]',
+    r'for\s+\w+\s+in\s+.*;',
+    r'sudo\s+',
+    r'apt-get\s+',
+    r'yum\s+'
+]
+
+# 语言优先级（从高到低）
+_LANG_PRIORITY = ('python', 'javascript', 'bash')
+
+# 所有特征合并为一个正则，每种语言一个命名分组；零宽前瞻保证每个位置都会被检查，
+# 同一位置按分组顺序优先匹配高优先级语言
+_LANG_RE = re.compile(
+    '(?=(?P<python>' + '|'.join(_PYTHON_PATTERNS) + ')'
+    + '|(?P<javascript>' + '|'.join(_JS_PATTERNS) + ')'
+    + '|(?m:(?P<bash>' + '|'.join(_BASH_PATTERNS) + ')))'
+)
+
+# Markdown 代码块与行内代码，一次扫描同时识别两种形式
+# 行内代码的结束反引号不能是 ``` 的开头，避免吞掉后面代码块的起始标记
+_CODE_RE = re.compile(
+    r'```(?P<lang>\w+)?\n(?P<fenced>[\s\S]*?)```|`(?P<inline>[^`]+)`(?!``)',
+    re.MULTILINE
+)
+
 
 class CodeExecutor:
     """
@@ -38,6 +132,11 @@ class CodeExecutor:
             'javascript': ['js', 'javascript'],
             'bash': ['sh', 'bash', 'shell']
         }
+        # 常驻 Python 工作进程（首次执行 Python 代码时启动）
+        self._python_worker: Optional[subprocess.Popen] = None
+        self._python_worker_lock = threading.Lock()
+        # Node.js 可执行文件路径（启动时查找一次）
+        self._node_path = shutil.which('node')
         self._init_gemini()
 
     def _init_gemini(self):
@@ -50,7 +149,7 @@ class CodeExecutor:
         try:
             api_key = os.getenv('GOOGLE_API_KEY')
             if api_key:
-                self.gemini_model = init_gemini(api_key)
+                self.gemini_model = _cached_gemini_model(api_key)
                 print('Gemini 模型初始化成功')
             else:
                 print('警告: 未配置 GOOGLE_API_KEY，代码生成功能将受限')
@@ -76,57 +175,15 @@ class CodeExecutor:
         Returns:
             str: 检测到的语言标识符，未知时返回 None
         """
-        code_lower = code.lower().strip()
-
-        # Python 检测
-        python_patterns = [
-            r'^import\s+\w+',
-            r'^from\s+\w+\s+import',
-            r'^def\s+\w+\s*\(',
-            r'^class\s+\w+\s*[:(]',
-            r'print\s*\(',
-            r'if\s+__name__\s*==\s*[\'"]__main__[\'"]',
-            r'\[.*for\s+\w+\s+in\s+.*\]',
-            r'\.append\s*\(',
-            r'\.extend\s*\('
-        ]
+        # 一次扫描，取命中的最高优先级语言（Python -> JavaScript -> Bash）
+        best = len(_LANG_PRIORITY)
+        for match in _LANG_RE.finditer(code):
+            best = min(best, _LANG_PRIORITY.index(match.lastgroup))
+            if best == 0:
+                break
 
-        for pattern in python_patterns:
-            if re.search(pattern, code):
-                return 'python'
-
-        # JavaScript 检测
-        js_patterns = [
-            r'console\.log\s*\(',
-            r'function\s+\w+\s*\(',
-            r'const\s+\w+\s*=',
-            r'let\s+\w+\s*=',
-            r'=>\s*\{',
-            r'require\s*\(',
-            r'module\.exports',
-            r'\.forEach\s*\(',
-            r'\.map\s*\('
-        ]
-
-        for pattern in js_patterns:
-            if re.search(pattern, code):
-                return 'javascript'
-
-        # Bash 检测
-        bash_patterns = [
-            r'^#!\s*/bin/(ba)?sh',
-            r'echo\s+["\']',
-            r'\$\(',
-            r'if\s+\[\s+.*\s+\]',
-            r'for\s+\w+\s+in\s+.*;',
-            r'sudo\s+',
-            r'apt-get\s+',
-            r'yum\s+'
-        ]
-
-        for pattern in bash_patterns:
-            if re.search(pattern, code, re.MULTILINE):
-                return 'bash'
+        if best < len(_LANG_PRIORITY):
+            return _LANG_PRIORITY[best]
 
         return 'python'
 
@@ -192,24 +249,25 @@ class CodeExecutor:
             List[Dict]: 代码块列表，每个包含 language 和 code
         """
         code_blocks = []
+        inline_codes = []
 
-        # 处理 Markdown 代码块
-        markdown_pattern = r'```(\w+)?\n([\s\S]*?)```'
-        matches = re.findall(markdown_pattern, text, re.MULTILINE)
+        for match in _CODE_RE.finditer(text):
+            code = match.group('fenced')
+            if code is None:
+                inline_codes.append(match.group('inline'))
+                continue
 
-        for lang, code in matches:
+            # 处理 Markdown 代码块
+            lang = match.group('lang')
             language = lang.lower() if lang else self.detect_language(code)
             code_blocks.append({
                 'language': language or 'python',
                 'code': code.strip()
             })
 
-        # 处理行内代码
+        # 没有 Markdown 代码块时处理行内代码
         if not code_blocks:
-            inline_pattern = r'`([^`]+)`'
-            matches = re.findall(inline_pattern, text)
-
-            for code in matches:
+            for code in inline_codes:
                 language = self.detect_language(code)
                 if language:
                     code_blocks.append({
@@ -270,44 +328,114 @@ class CodeExecutor:
         output_capture = OutputCapture()
 
         try:
-            # 创建临时文件执行
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as tmp_file:
-                tmp_file.write(code)
-                tmp_file_path = tmp_file.name
+            # 交给常驻工作进程执行，避免每次启动新解释器
+            with self._python_worker_lock:
+                result = self._run_in_python_worker(code)
 
-            try:
-                # 使用子进程执行，限制时间和资源
-                result = subprocess.run(
-                    [sys.executable, tmp_file_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=30,
-                    cwd=tmp_file_path.replace('.py', '_files') if os.path.exists(tmp_file_path.replace('.py', '_files')) else None
-                )
+            output = result.get('stdout', '')
+            error = result.get('stderr', '')
 
-                output = result.stdout
-                error = result.stderr
-
-                if output:
-                    output_capture.add_output(output)
-                if error:
-                    output_capture.add_error(error)
-
-                if not output and not error:
-                    output_capture.add_output('代码执行完成，无输出')
+            if output:
+                output_capture.add_output(output)
+            if error:
+                output_capture.add_error(error)
 
-                return output_capture.get_output()
+            if not output and not error:
+                output_capture.add_output('代码执行完成，无输出')
 
-            finally:
-                # 清理临时文件
-                if os.path.exists(tmp_file_path):
-                    os.remove(tmp_file_path)
+            return output_capture.get_output()
 
         except subprocess.TimeoutExpired:
             return '错误: Python 代码执行超时（超过30秒）'
         except Exception as e:
             return f'错误: Python 执行失败 - {str(e)}'
 
+    def _run_in_python_worker(self, code: str) -> Dict[str, str]:
+        """
+        通过常驻工作进程执行一段 Python 代码（调用方需持有 _python_worker_lock）
+
+        工作进程为每段代码 fork 一个一次性子进程并自行处理超时；
+        若工作进程本身在超时后仍无响应或异常退出，则终止它，下次调用重新启动
+
+        Args:
+            code: Python 代码
+
+        Returns:
+            Dict[str, str]: 包含 stdout 和 stderr 的执行结果
+
+        Raises:
+            subprocess.TimeoutExpired: 执行超时
+            RuntimeError: 工作进程异常退出
+        """
+        worker = self._python_worker
+        if worker is None or worker.poll() is not None:
+            # 无缓冲的二进制管道：select 直接作用于底层 fd，不会漏掉已缓冲的数据
+            worker = self._python_worker = subprocess.Popen(
+                [sys.executable, '-u', _PYTHON_WORKER_PATH],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0
+            )
+
+        try:
+            request = {'code': code, 'timeout': _EXECUTION_TIMEOUT, 'max_output': _MAX_OUTPUT_BYTES}
+            data = memoryview(json.dumps(request).encode('utf-8') + b'\n')
+            while data:
+                data = data[worker.stdin.write(data):]
+
+            result = json.loads(self._read_worker_line(worker, _EXECUTION_TIMEOUT + 5))
+        except BaseException:
+            self._stop_python_worker()
+            raise
+
+        if result.get('timeout'):
+            raise subprocess.TimeoutExpired(worker.args, _EXECUTION_TIMEOUT)
+        return result
+
+    @staticmethod
+    def _read_worker_line(worker: subprocess.Popen, timeout: float) -> bytes:
+        """
+        在超时内从工作进程读取一行响应
+
+        Args:
+            worker: 工作进程
+            timeout: 超时时间（秒）
+
+        Returns:
+            bytes: 一行响应（不含换行符）
+
+        Raises:
+            subprocess.TimeoutExpired: 超时未读到完整一行
+            RuntimeError: 工作进程异常退出
+        """
+        fd = worker.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        chunks = []
+        while True:
+            remaining = deadline - time.monotonic()
+            ready, _, _ = select.select([fd], [], [], max(remaining, 0))
+            if not ready:
+                raise subprocess.TimeoutExpired(worker.args, timeout)
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise RuntimeError('执行进程意外退出')
+            newline = chunk.find(b'\n')
+            if newline >= 0:
+                # 每次只发送一个请求，换行之后不会再有数据
+                chunks.append(chunk[:newline])
+                return b''.join(chunks)
+            chunks.append(chunk)
+
+    def _stop_python_worker(self) -> None:
+        """
+        终止常驻 Python 工作进程
+        """
+        worker, self._python_worker = self._python_worker, None
+        if worker is not None and worker.poll() is None:
+            worker.kill()
+            worker.wait()
+
     def _execute_javascript(self, code: str) -> str:
         """
         执行 JavaScript 代码
@@ -320,13 +448,7 @@ class CodeExecutor:
         """
         try:
             # 检查是否有 Node.js
-            result = subprocess.run(
-                ['which', 'node'],
-                capture_output=True,
-                text=True
-            )
-
-            if result.returncode != 0:
+            if not self._node_path:
                 return '错误: 系统未安装 Node.js，无法执行 JavaScript'
 
             with tempfile.NamedTemporaryFile(mode='w', suffix='.js', delete=False) as tmp_file:
@@ -335,14 +457,13 @@ class CodeExecutor:
 
             try:
                 result = subprocess.run(
-                    ['node', tmp_file_path],
+                    [self._node_path, tmp_file_path],
                     capture_output=True,
-                    text=True,
                     timeout=30
                 )
 
-                output = result.stdout
-                error = result.stderr
+                output = _decode_output(result.stdout)
+                error = _decode_output(result.stderr)
 
                 if output:
                     return output
@@ -373,13 +494,12 @@ class CodeExecutor:
             result = subprocess.run(
                 ['/bin/bash', '-c', code],
                 capture_output=True,
-                text=True,
                 timeout=30,
                 shell=False
             )
 
-            output = result.stdout
-            error = result.stderr
+            output = _decode_output(result.stdout)
+            error = _decode_output(result.stderr)
             return_code = result.returncode
 
             if output:
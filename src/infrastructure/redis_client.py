@@ -2,12 +2,31 @@
 Redis客户端模块
 
 提供Redis连接池管理和基础操作
+
+基于 redis.asyncio 实现，所有操作均为协程，不会阻塞事件循环
 """
 
 import os
+import socket
+import asyncio
 import logging
 from typing import Optional, Any, Dict, List
-from datetime import timedelta
+
+# TCP keepalive 参数（部分平台不提供这些选项，缺失时使用系统默认值）
+_KEEPALIVE_OPTIONS = {
+    getattr(socket, name): value
+    for name, value in (("TCP_KEEPIDLE", 30), ("TCP_KEEPINTVL", 10), ("TCP_KEEPCNT", 3))
+    if hasattr(socket, name)
+}
+
+# Redis 相关环境变量，导入时读取一次
+_ENV_REDIS: Dict[str, Any] = {
+    "host": os.getenv("REDIS_HOST", "localhost"),
+    "port": int(os.getenv("REDIS_PORT", "6379")),
+    "db": int(os.getenv("REDIS_DB", "0")),
+    "password": os.getenv("REDIS_PASSWORD"),
+    "unix_socket_path": os.getenv("REDIS_UNIX_SOCKET") or None,
+}
 
 
 class RedisClient:
@@ -23,7 +42,10 @@ class RedisClient:
                  port: int = 6379,
                  db: int = 0,
                  password: Optional[str] = None,
-                 max_connections: int = 10):
+                 max_connections: int = 10,
+                 unix_socket_path: Optional[str] = None,
+                 pool_timeout: float = 5.0,
+                 health_check_interval: int = 30):
         """
         初始化Redis客户端
         
@@ -33,12 +55,18 @@ class RedisClient:
             db: 数据库编号
             password: 密码
             max_connections: 最大连接数
-        """
-        self.host = host or os.getenv("REDIS_HOST", "localhost")
-        self.port = int(port or os.getenv("REDIS_PORT", 6379))
-        self.db = int(db or os.getenv("REDIS_DB", 0))
-        self.password = password or os.getenv("REDIS_PASSWORD")
+            unix_socket_path: UNIX 域套接字路径，设置后忽略 host/port（Redis 与应用同机部署时使用）
+            pool_timeout: 连接池耗尽时等待空闲连接的最长时间（秒）
+            health_check_interval: 空闲连接复用前的健康检查间隔（秒）
+        """
+        self.host = host or _ENV_REDIS["host"]
+        self.port = int(port or _ENV_REDIS["port"])
+        self.db = int(db or _ENV_REDIS["db"])
+        self.password = password or _ENV_REDIS["password"]
         self.max_connections = max_connections
+        self.unix_socket_path = unix_socket_path or _ENV_REDIS["unix_socket_path"]
+        self.pool_timeout = pool_timeout
+        self.health_check_interval = health_check_interval
         
         self.logger = logging.getLogger(__name__)
         self._pool = None
@@ -52,37 +80,58 @@ class RedisClient:
             Dict: 连接参数字典
         """
         params = {
-            "host": self.host,
-            "port": self.port,
             "db": self.db,
             "decode_responses": True,
             "socket_connect_timeout": 5,
-            "socket_timeout": 5
+            "socket_timeout": 5,
+            "health_check_interval": self.health_check_interval
         }
+        if self.unix_socket_path:
+            params["path"] = self.unix_socket_path
+        else:
+            params.update({
+                "host": self.host,
+                "port": self.port,
+                # 及时发现被中间设备静默断开的空闲连接；TCP_NODELAY 由 redis-py/asyncio 默认开启
+                "socket_keepalive": True,
+                "socket_keepalive_options": _KEEPALIVE_OPTIONS
+            })
         if self.password:
             params["password"] = self.password
         return params
     
-    def get_client(self):
+    async def get_client(self):
         """
         获取Redis客户端实例
         
         Returns:
-            Redis客户端实例
+            Redis客户端实例，不可用时返回None
         """
         if self._client is None:
             try:
-                import redis
-                self._client = redis.Redis(**self._get_connection_params())
+                import redis.asyncio as aioredis
+                params = self._get_connection_params()
+                if self.unix_socket_path:
+                    params["connection_class"] = aioredis.UnixDomainSocketConnection
+                # 连接数达到上限时等待空闲连接，而不是抛出异常
+                self._pool = aioredis.BlockingConnectionPool(
+                    max_connections=self.max_connections,
+                    timeout=self.pool_timeout,
+                    **params
+                )
+                client = aioredis.Redis(connection_pool=self._pool)
                 # 测试连接
-                self._client.ping()
-                self.logger.info(f"Redis连接成功: {self.host}:{self.port}")
+                await client.ping()
+                self._client = client
+                self.logger.info(f"Redis连接成功: {self.unix_socket_path or f'{self.host}:{self.port}'}")
             except Exception as e:
                 self.logger.warning(f"Redis连接失败: {str(e)}，将使用降级方案")
-                self._client = None
+                if self._pool is not None:
+                    await self._pool.disconnect()
+                    self._pool = None
         return self._client
     
-    def is_available(self) -> bool:
+    async def is_available(self) -> bool:
         """
         检查Redis是否可用
         
@@ -90,15 +139,58 @@ class RedisClient:
             bool: Redis是否可用
         """
         try:
-            client = self.get_client()
+            client = await self.get_client()
             if client:
-                client.ping()
+                await client.ping()
                 return True
             return False
         except Exception:
             return False
     
-    def get(self, key: str) -> Optional[str]:
+    async def warmup(self, n: Optional[int] = None) -> int:
+        """
+        预先建立连接池中的连接，避免首批请求承担建连开销
+        
+        Args:
+            n: 建立的连接数，默认与最大连接数相同
+            
+        Returns:
+            int: 成功建立的连接数
+        """
+        client = self._client or await self.get_client()
+        if not client:
+            return 0
+        count = min(n or self.max_connections, self.max_connections)
+        # 并发 PING 时每个请求各占用一个连接，从而一次性打开 count 个连接
+        results = await asyncio.gather(
+            *(client.ping() for _ in range(count)),
+            return_exceptions=True
+        )
+        warmed = sum(1 for r in results if r is True)
+        self.logger.info(f"Redis连接池预热完成: {warmed}/{count}")
+        return warmed
+    
+    async def pipeline(self, transaction: bool = False):
+        """
+        创建管道，将多条命令合并为一次往返发送
+        
+        用法: async with await client.pipeline() as pipe:
+                  pipe.lpush(key, value)
+                  pipe.expire(key, ttl)
+                  await pipe.execute()
+        
+        Args:
+            transaction: 是否以 MULTI/EXEC 事务方式执行
+            
+        Returns:
+            管道实例，Redis不可用时返回None
+        """
+        client = self._client or await self.get_client()
+        if client:
+            return client.pipeline(transaction=transaction)
+        return None
+    
+    async def get(self, key: str) -> Optional[str]:
         """
         获取键对应的值
         
@@ -108,12 +200,12 @@ class RedisClient:
         Returns:
             Optional[str]: 值，不存在返回None
         """
-        client = self.get_client()
+        client = self._client or await self.get_client()
         if client:
-            return client.get(key)
+            return await client.get(key)
         return None
     
-    def set(self, key: str, value: str,
+    async def set(self, key: str, value: str,
             ex: Optional[int] = None) -> bool:
         """
         设置键值对
@@ -126,12 +218,12 @@ class RedisClient:
         Returns:
             bool: 是否成功
         """
-        client = self.get_client()
+        client = self._client or await self.get_client()
         if client:
-            return client.set(key, value, ex=ex)
+            return await client.set(key, value, ex=ex)
         return False
     
-    def delete(self, *keys: str) -> int:
+    async def delete(self, *keys: str) -> int:
         """
         删除键
         
@@ -141,12 +233,12 @@ class RedisClient:
         Returns:
             int: 删除的键数量
         """
-        client = self.get_client()
+        client = self._client or await self.get_client()
         if client:
-            return client.delete(*keys)
+            return await client.delete(*keys)
         return 0
     
-    def exists(self, *keys: str) -> int:
+    async def exists(self, *keys: str) -> int:
         """
         检查键是否存在
         
@@ -156,12 +248,12 @@ class RedisClient:
         Returns:
             int: 存在的键数量
         """
-        client = self.get_client()
+        client = self._client or await self.get_client()
         if client:
-            return client.exists(*keys)
+            return await client.exists(*keys)
         return 0
     
-    def expire(self, key: str, seconds: int) -> bool:
+    async def expire(self, key: str, seconds: int) -> bool:
         """
         设置键的过期时间
         
@@ -172,12 +264,12 @@ class RedisClient:
         Returns:
             bool: 是否成功
         """
-        client = self.get_client()
+        client = self._client or await self.get_client()
         if client:
-            return client.expire(key, seconds)
+            return await client.expire(key, seconds)
         return False
     
-    def lpush(self, key: str, *values: str) -> int:
+    async def lpush(self, key: str, *values: str) -> int:
         """
         从列表左侧插入值
         
@@ -188,12 +280,12 @@ class RedisClient:
         Returns:
             int: 列表长度
         """
-        client = self.get_client()
+        client = self._client or await self.get_client()
         if client:
-            return client.lpush(key, *values)
+            return await client.lpush(key, *values)
         return 0
     
-    def rpush(self, key: str, *values: str) -> int:
+    async def rpush(self, key: str, *values: str) -> int:
         """
         从列表右侧插入值
         
@@ -204,12 +296,12 @@ class RedisClient:
         Returns:
             int: 列表长度
         """
-        client = self.get_client()
+        client = self._client or await self.get_client()
         if client:
-            return client.rpush(key, *values)
+            return await client.rpush(key, *values)
         return 0
     
-    def lrange(self, key: str, start: int, end: int) -> List[str]:
+    async def lrange(self, key: str, start: int, end: int) -> List[str]:
         """
         获取列表范围内的元素
         
@@ -221,12 +313,12 @@ class RedisClient:
         Returns:
             List[str]: 元素列表
         """
-        client = self.get_client()
+        client = self._client or await self.get_client()
         if client:
-            return client.lrange(key, start, end)
+            return await client.lrange(key, start, end)
         return []
     
-    def llen(self, key: str) -> int:
+    async def llen(self, key: str) -> int:
         """
         获取列表长度
         
@@ -236,12 +328,12 @@ class RedisClient:
         Returns:
             int: 列表长度
         """
-        client = self.get_client()
+        client = self._client or await self.get_client()
         if client:
-            return client.llen(key)
+            return await client.llen(key)
         return 0
     
-    def ltrim(self, key: str, start: int, end: int) -> bool:
+    async def ltrim(self, key: str, start: int, end: int) -> bool:
         """
         修剪列表
         
@@ -253,12 +345,12 @@ class RedisClient:
         Returns:
             bool: 是否成功
         """
-        client = self.get_client()
+        client = self._client or await self.get_client()
         if client:
-            return client.ltrim(key, start, end)
+            return await client.ltrim(key, start, end)
         return False
     
-    def hset(self, name: str, key: str, value: str) -> int:
+    async def hset(self, name: str, key: str, value: str) -> int:
         """
         设置哈希表字段值
         
@@ -270,12 +362,12 @@ class RedisClient:
         Returns:
             int: 新增字段返回1，更新返回0
         """
-        client = self.get_client()
+        client = self._client or await self.get_client()
         if client:
-            return client.hset(name, key, value)
+            return await client.hset(name, key, value)
         return 0
     
-    def hget(self, name: str, key: str) -> Optional[str]:
+    async def hget(self, name: str, key: str) -> Optional[str]:
         """
         获取哈希表字段值
         
@@ -286,12 +378,12 @@ class RedisClient:
         Returns:
             Optional[str]: 字段值，不存在返回None
         """
-        client = self.get_client()
+        client = self._client or await self.get_client()
         if client:
-            return client.hget(name, key)
+            return await client.hget(name, key)
         return None
     
-    def hgetall(self, name: str) -> Dict[str, str]:
+    async def hgetall(self, name: str) -> Dict[str, str]:
         """
         获取哈希表所有字段和值
         
@@ -301,25 +393,27 @@ class RedisClient:
         Returns:
             Dict[str, str]: 字段值字典
         """
-        client = self.get_client()
+        client = self._client or await self.get_client()
         if client:
-            return client.hgetall(name)
+            return await client.hgetall(name)
         return {}
     
-    def close(self) -> None:
+    async def close(self) -> None:
         """
         关闭连接
         """
         if self._client:
-            self._client.close()
+            await self._client.aclose()
+            await self._pool.disconnect()
             self._client = None
+            self._pool = None
             self.logger.info("Redis连接已关闭")
 
-
 def create_redis_client(host: Optional[str] = None,
                         port: Optional[int] = None,
                         db: Optional[int] = None,
-                        password: Optional[str] = None) -> RedisClient:
+                        password: Optional[str] = None,
+                        unix_socket_path: Optional[str] = None) -> RedisClient:
     """
     创建Redis客户端实例（单例）
     
@@ -328,12 +422,14 @@ def create_redis_client(host: Optional[str] = None,
         port: Redis端口
         db: 数据库编号
         password: 密码
+        unix_socket_path: UNIX 域套接字路径
         
     Returns:
         RedisClient: 客户端实例
     """
     if RedisClient._instance is None:
-        RedisClient._instance = RedisClient(host, port, db, password)
+        RedisClient._instance = RedisClient(host, port, db, password,
+                                            unix_socket_path=unix_socket_path)
     return RedisClient._instance
 
 
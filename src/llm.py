@@ -5,9 +5,23 @@ LLM模型封装模块
 """
 
 import os
-from typing import Optional, Any, List, Dict
+import asyncio
+import logging
+from functools import cache
+from typing import Optional, Any, List, Dict, AsyncIterator
 from enum import Enum
 
+from openrouter import OpenRouterClient, get_response as or_get_response
+
+logger = logging.getLogger(__name__)
+
+
+# 启动预热时探测的模型服务地址
+_PROVIDER_HOSTS = {
+    "openrouter": "https://openrouter.ai",
+    "gemini": "https://generativelanguage.googleapis.com",
+}
+
 
 class ModelProvider(Enum):
     """
@@ -30,8 +44,27 @@ class LLMManager:
         """
         self.openrouter_client = None
         self.gemini_client = None
+        self._gemini_api_key = None
         self.current_provider = ModelProvider.OPENROUTER
         self.default_model = "tngtech/deepseek-r1t2-chimera:free"
+        self._http = None
+        # 限制同时进行的模型调用数量，突发请求在本地排队而不是同时建立大量连接
+        self._semaphore = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+
+    def _get_http_client(self) -> Any:
+        """
+        获取（必要时创建）各模型服务共用的异步 HTTP 客户端，保持连接复用
+
+        Returns:
+            httpx.AsyncClient实例
+        """
+        if self._http is None:
+            import httpx
+
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60)
+            )
+        return self._http
 
     def init_openrouter(self, api_key: Optional[str] = None, model: Optional[str] = None) -> Any:
         """
@@ -44,8 +77,6 @@ class LLMManager:
         Returns:
             OpenRouterClient实例
         """
-        from openrouter import OpenRouterClient
-
         if api_key is None:
             api_key = os.getenv("OPENROUTER_API_KEY")
 
@@ -69,6 +100,7 @@ class LLMManager:
             Gemini客户端实例
         """
         import google.genai as genai
+        from google.genai import types
 
         if api_key is None:
             api_key = os.getenv("GOOGLE_API_KEY")
@@ -76,13 +108,18 @@ class LLMManager:
         if not api_key:
             raise ValueError("Google API Key未配置")
 
-        client = genai.Client(api_key=api_key)
+        # 异步调用复用共享的 HTTP 客户端，避免每个客户端各自建立连接
+        client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(httpx_async_client=self._get_http_client())
+        )
         self.gemini_client = client
+        self._gemini_api_key = api_key
         self.current_provider = ModelProvider.GEMINI
 
         return client
 
-    def get_response(self, user_message: str, model: Optional[str] = None) -> str:
+    async def get_response(self, user_message: str, model: Optional[str] = None) -> str:
         """
         获取AI生成的回复
 
@@ -97,18 +134,20 @@ class LLMManager:
             if self.openrouter_client is None:
                 self.init_openrouter()
 
-            from openrouter import get_response as or_get_response
-            return or_get_response(self.openrouter_client, user_message)
+            # OpenRouter 客户端基于 requests，放到线程中执行以免阻塞事件循环
+            async with self._semaphore:
+                return await asyncio.to_thread(or_get_response, self.openrouter_client, user_message)
 
         elif self.current_provider == ModelProvider.GEMINI:
             if self.gemini_client is None:
-                self.init_gemini()
+                self.init_gemini(self._gemini_api_key)
 
             try:
-                response = self.gemini_client.models.generate_content(
-                    model=model or "",
-                    contents=user_message
-                )
+                async with self._semaphore:
+                    response = await self.gemini_client.aio.models.generate_content(
+                        model=model or "",
+                        contents=user_message
+                    )
                 return response.text
             except Exception as e:
                 raise Exception(f"Gemini API调用失败: {str(e)}")
@@ -116,6 +155,63 @@ class LLMManager:
         else:
             raise ValueError(f"未知的模型提供商: {self.current_provider}")
 
+    async def stream_response(self, user_message: str,
+                              model: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        以流式方式获取AI生成的回复，边生成边返回文本片段
+
+        OpenRouter 客户端不支持流式输出，整段回复作为一个片段返回
+
+        Args:
+            user_message: 用户消息
+            model: 使用的模型（可选）
+
+        Yields:
+            str: 回复文本片段
+        """
+        if self.current_provider == ModelProvider.GEMINI:
+            if self.gemini_client is None:
+                self.init_gemini(self._gemini_api_key)
+
+            try:
+                # 整个流式读取期间占用一个并发名额
+                async with self._semaphore:
+                    stream = await self.gemini_client.aio.models.generate_content_stream(
+                        model=model or "",
+                        contents=user_message
+                    )
+                    async for chunk in stream:
+                        if chunk.text:
+                            yield chunk.text
+            except Exception as e:
+                raise Exception(f"Gemini API调用失败: {str(e)}")
+        else:
+            yield await self.get_response(user_message, model)
+
+    async def warmup(self) -> None:
+        """
+        预先与各模型服务建立连接，避免首次调用承担 TCP/TLS 握手开销
+        """
+        http = self._get_http_client()
+        results = await asyncio.gather(
+            *(http.head(url, timeout=5) for url in _PROVIDER_HOSTS.values()),
+            return_exceptions=True
+        )
+        for name, result in zip(_PROVIDER_HOSTS, results):
+            if isinstance(result, Exception):
+                logger.warning(f"预热 {name} 连接失败: {result}")
+
+    async def aclose(self) -> None:
+        """
+        关闭共享的 HTTP 客户端
+
+        Gemini 客户端持有该 HTTP 客户端，一并释放，下次调用时以新的连接池重建
+        """
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self.gemini_client = None
+
     def switch_provider(self, provider: ModelProvider) -> None:
         """
         切换模型提供商
@@ -135,22 +231,17 @@ class LLMManager:
         return self.current_provider
 
 
-_llm_manager: Optional[LLMManager] = None
-
-
+@cache
 def get_llm_manager() -> LLMManager:
     """
     获取LLM管理器单例
 
+    首次调用时创建，之后直接返回缓存的同一实例。
+
     Returns:
         LLMManager实例
     """
-    global _llm_manager
-
-    if _llm_manager is None:
-        _llm_manager = LLMManager()
-
-    return _llm_manager
+    return LLMManager()
 
 
 def init_llm(provider: str = "openrouter", api_key: Optional[str] = None) -> Any:
@@ -174,7 +265,7 @@ def init_llm(provider: str = "openrouter", api_key: Optional[str] = None) -> Any
         raise ValueError(f"不支持的模型提供商: {provider}")
 
 
-def get_llm_response(user_message: str, model: Optional[str] = None) -> str:
+async def get_llm_response(user_message: str, model: Optional[str] = None) -> str:
     """
     获取LLM生成的回复
 
@@ -186,12 +277,11 @@ def get_llm_response(user_message: str, model: Optional[str] = None) -> str:
         str: 生成的回复
     """
     manager = get_llm_manager()
-    return manager.get_response(user_message, model)
+    return await manager.get_response(user_message, model)
 
 
 def reset_llm_manager() -> None:
     """
     重置LLM管理器
     """
-    global _llm_manager
-    _llm_manager = None
+    get_llm_manager.cache_clear()
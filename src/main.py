@@ -10,10 +10,22 @@ import sys
 import signal
 import logging
 import asyncio
+import json
+import threading
+from contextlib import aclosing
 from typing import Optional, Dict
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库 json
+    orjson = None
+
 from dotenv import load_dotenv
+
+# 在导入项目模块之前加载 .env：部分模块（会话、Redis 客户端）在导入时读取环境变量
+load_dotenv()
+
 from fastapi import FastAPI, HTTPException, WebSocket
 from pydantic import BaseModel
 import uvicorn
@@ -28,14 +40,15 @@ from api.routes import router as api_router
 
 from adapters.llm import init_client, OpenRouterClient
 from adapters.llm.clawdbot_client import ClawdbotClient
-from adapters.llm.clawdbot_client import ClawdbotClient
 from core import Agent, create_agent
 from core.session import create_session_manager
+from core.types import parse_session_target
 from core.prompt import create_prompt_builder
 from core.memory import create_memory_bank
+from core.async_writer import get_memory_writer
 from core.tools.clawdbot_cli import ClawdbotCliTool
 from core.services.message_processor import MessageProcessor
-from infrastructure.redis_client import create_redis_client
+from core.services.http_session import close_http_session
 from config import get_settings
 
 # 配置日志
@@ -45,6 +58,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger("Clawdbot")
 
+# NapCat 日志中二维码地址行的标记
+_QR_LOG_MARKER = "二维码解码URL:"
+
+def _read_text(path: str) -> str:
+    """读取 UTF-8 文本文件"""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _write_text(path: str, content: str) -> None:
+    """写入 UTF-8 文本文件，必要时创建所在目录"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
 # API Models
 class SendMessageRequest(BaseModel):
     platform: str = "qq"  # 'qq' or 'lark'
@@ -64,8 +93,6 @@ class ClawdbotApplication:
         """
         初始化应用程序
         """
-        load_dotenv()
-        
         self.settings = get_settings()
         self.app = FastAPI(title="Clawdbot API", version="2.0.0")
         
@@ -79,6 +106,8 @@ class ClawdbotApplication:
         self.app.state.channel_manager = self.channel_manager # Inject for API Router
         
         self.ws_manager = ConnectionManager() # For UI
+        self._last_qr_url = ""  # 最近一次写入二维码文件的地址
+        self._monitor_html: Optional[str] = None  # 监控页面模板缓存
         
         self.app.include_router(api_router)
         self._setup_routes()
@@ -97,11 +126,13 @@ class ClawdbotApplication:
         @self.app.get("/")
         async def get_monitor():
             from fastapi.responses import HTMLResponse
-            try:
-                with open("src/templates/monitor.html", "r", encoding="utf-8") as f:
-                    return HTMLResponse(content=f.read())
-            except FileNotFoundError:
-                return HTMLResponse(content="Monitor template not found.", status_code=404)
+            # 模板首次请求时读取（在线程中，不阻塞事件循环）并缓存，之后不再访问磁盘
+            if self._monitor_html is None:
+                try:
+                    self._monitor_html = await asyncio.to_thread(_read_text, "src/templates/monitor.html")
+                except FileNotFoundError:
+                    return HTMLResponse(content="Monitor template not found.", status_code=404)
+            return HTMLResponse(content=self._monitor_html)
 
         @self.app.websocket("/ws/monitor")
         async def websocket_endpoint(websocket: WebSocket):
@@ -156,39 +187,21 @@ class ClawdbotApplication:
                     logger.info(f"Received async notification for session {session_id}")
                     
                     # 解析 session_id 以获取目标 chat_id 和 platform
-                    # 格式可能是 "platform:user:id:date" 或 "platform:type:chat_id"
-                    # 这里我们依赖 agent.py 中传递的 callback_session_id
-                    
-                    platform = "qq"
-                    chat_id = session_id
-                    msg_type = "private"
-                    
-                    if ":" in session_id:
-                        parts = session_id.split(":")
-                        if len(parts) >= 3:
-                            platform = parts[0]
-                            # Assuming format platform:type:chat_id
-                            if parts[1] in ["private", "group"]:
-                                msg_type = parts[1]
-                                chat_id = ":".join(parts[2:])
-                            else:
-                                # Fallback or other format
-                                chat_id = ":".join(parts[1:]) 
-                        elif len(parts) == 2:
-                            platform = parts[0]
-                            chat_id = parts[1]
+                    # 这里我们依赖 agent.py 中传递的 callback_session_id（格式 "platform:type:chat_id"）
+                    target = parse_session_target(session_id)
                     
                     # 发送消息
-                    from channels.base import UnifiedSendRequest
                     req = UnifiedSendRequest(
-                        chat_id=chat_id,
+                        chat_id=target.chat_id,
                         content=content,
-                        message_type=msg_type
+                        message_type=target.message_type
                     )
                     
-                    success = await self.channel_manager.send_message(platform, req)
-                    if success and platform == "qq":
-                        await self._broadcast_sent_message(platform, chat_id, content, msg_type)
+                    success = await self.channel_manager.send_message(target.platform, req)
+                    if success and target.platform == "qq":
+                        await self._broadcast_sent_message(
+                            target.platform, target.chat_id, content, target.message_type
+                        )
                         
                 except Exception as e:
                     logger.error(f"Async Notification Callback failed: {e}")
@@ -233,6 +246,11 @@ class ClawdbotApplication:
             # Set Global Handler
             self.channel_manager.set_global_handler(self._handle_unified_message)
             
+            # 启用 Redis 时预热会话存储使用的连接池，避免首条消息承担建连开销
+            if session_manager.redis_enabled:
+                warmed = await session_manager.awarmup()
+                logger.info(f"Redis连接池预热完成: {warmed} 个连接")
+
             # Start Channels
             await self.channel_manager.start_all()
             
@@ -259,12 +277,16 @@ class ClawdbotApplication:
         """
         try:
             # 1. Broadcast to UI (if it's a message we want to show)
+            # 2. Process via Service (OCR + Session + Agent)
+            # 两者互不依赖，并发执行，UI 广播不再推迟消息处理
             if message.platform == "qq":
                 # Reconstruct legacy format for UI compatibility if needed
-                await self._broadcast_ui_message_from_unified(message, direction="received")
-
-            # 2. Process via Service (OCR + Session + Agent)
-            result = await self.message_processor.process(message)
+                _, result = await asyncio.gather(
+                    self._broadcast_ui_message_from_unified(message, direction="received"),
+                    self.message_processor.process(message)
+                )
+            else:
+                result = await self.message_processor.process(message)
 
             # [Debug] 发送调试信息
             if result.get("success") and result.get("debug_info"):
@@ -340,6 +362,8 @@ class ClawdbotApplication:
     async def _monitor_napcat_logs(self):
         """
         持续监控 NapCat 容器日志，用于提取登录二维码
+
+        以 follow 模式流式读取日志，只处理新产生的行；容器停止后等待并重新连接
         """
         logger.info("Starting NapCat log monitor...")
         try:
@@ -360,38 +384,91 @@ class ClawdbotApplication:
                         await asyncio.sleep(5)
                         continue
 
-                    # Get last 50 lines
-                    logs = container.logs(tail=50).decode("utf-8", errors="ignore")
-                    
-                    if "二维码解码URL:" in logs:
-                        for line in logs.split("\n"):
-                            if "二维码解码URL:" in line:
-                                url_line = line.strip()
-                                
-                                qr_path = self.settings.qr_code_path
-                                current_content = ""
-                                if os.path.exists(qr_path):
-                                    with open(qr_path, "r", encoding="utf-8") as f:
-                                        current_content = f.read().strip()
-                                
-                                if current_content != url_line:
-                                    os.makedirs(os.path.dirname(qr_path), exist_ok=True)
-                                    with open(qr_path, "w", encoding="utf-8") as f:
-                                        f.write(url_line)
-                                    logger.info(f"Updated QR code: {url_line}")
-                                break
+                    # aclosing 保证出错时立即执行生成器的清理（关闭日志流）
+                    async with aclosing(self._stream_qr_lines(container)) as qr_lines:
+                        async for url_line in qr_lines:
+                            await self._update_qr_code(url_line)
                     
                 except Exception as e:
                     logger.error(f"Error monitoring logs: {e}")
                 
+                # 日志流结束（容器停止或重启），稍后重新连接
                 await asyncio.sleep(2)
                 
         except Exception as e:
              logger.error(f"Failed to start log monitor: {e}")
 
+    async def _stream_qr_lines(self, container):
+        """
+        流式读取容器日志，逐条产出包含二维码地址的日志行
+
+        docker SDK 的日志流是阻塞迭代器，放在守护线程中读取，
+        只把命中的行通过队列交回事件循环；日志流结束时迭代结束
+
+        :param container: NapCat 容器对象
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        marker = _QR_LOG_MARKER.encode("utf-8")
+        # 先带出最近 50 行，以便发现启动前已打印的二维码
+        logs = await asyncio.to_thread(container.logs, stream=True, follow=True, tail=50)
+
+        def post(item) -> bool:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+                return True
+            except RuntimeError:
+                # 事件循环已关闭（应用退出）
+                return False
+
+        def pump() -> None:
+            buffer = b""
+            try:
+                for chunk in logs:
+                    buffer += chunk
+                    *lines, buffer = buffer.split(b"\n")
+                    for line in lines:
+                        if marker in line and not post(line.decode("utf-8", errors="ignore").strip()):
+                            return
+            except Exception as e:
+                post(e)
+            finally:
+                post(None)
+
+        threading.Thread(target=pump, name="napcat-log-stream", daemon=True).start()
+
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # 消费方出错或被取消时关闭日志流，读取线程随阻塞迭代结束而退出
+            logs.close()
+
+    async def _update_qr_code(self, url_line: str) -> None:
+        """
+        二维码地址变化时写入二维码文件
+
+        :param url_line: 包含二维码地址的日志行
+        """
+        # 与内存中上次写入的地址比较，不必每次读取文件
+        if url_line == self._last_qr_url:
+            return
+        await asyncio.to_thread(_write_text, self.settings.qr_code_path, url_line)
+        self._last_qr_url = url_line
+        logger.info(f"Updated QR code: {url_line}")
+
     async def stop(self) -> None:
         """停止应用程序"""
         await self.channel_manager.stop_all()
+        if self.message_processor:
+            await self.message_processor.aclose()
+        await get_memory_writer().close()
+        await close_http_session()
         logger.info("Clawdbot已停止")
 
 class ConnectionManager:
@@ -408,17 +485,28 @@ class ConnectionManager:
 
     def disconnect(self, websocket: WebSocket):
         """断开并移除 WebSocket 连接"""
-        self.active_connections.remove(websocket)
+        # 广播失败时连接可能已被移除
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
 
     async def broadcast(self, message: dict):
-        """向所有活跃的 WebSocket 连接广播 JSON 消息"""
-        import json
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(json.dumps(message))
-            except Exception as e:
-                logger.error(f"Error sending to websocket: {e}")
-
+        """向所有活跃的 WebSocket 连接并发广播 JSON 消息，发送失败的连接被移除"""
+        if not self.active_connections:
+            return
+        # 只序列化一次，所有连接共用
+        if orjson is not None:
+            payload = orjson.dumps(message).decode("utf-8")
+        else:
+            payload = json.dumps(message, ensure_ascii=False)
+        connections = list(self.active_connections)
+        results = await asyncio.gather(
+            *(connection.send_text(payload) for connection in connections),
+            return_exceptions=True
+        )
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error sending to websocket: {result}")
+                self.disconnect(connection)
 
 def main():
     """程序主入口"""
@@ -7,6 +7,8 @@ OpenCode服务集成模块
 import os
 import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 
@@ -31,8 +33,18 @@ class OpenCodeClient:
         self.session = requests.Session()
         self.session.headers.update({
             "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
+            "Content-Type": "application/json",
+            "Connection": "keep-alive"
         })
+        # 扩大连接池以支持并发请求复用连接；只对幂等请求（GET 等）重试，
+        # 避免重复提交生成请求
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504])
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.conversation_history: List[Dict[str, str]] = []
         self.last_request_time: Optional[datetime] = None
         self.request_interval: float = 1.0
@@ -6,10 +6,20 @@ OpenRouter API集成模块
 
 import os
 import json
+import asyncio
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:  # h2 为可选依赖，缺失时异步客户端使用 HTTP/1.1
+    _HTTP2_AVAILABLE = False
+
 
 class OpenRouterClient:
     """
@@ -34,11 +44,22 @@ class OpenRouterClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "HTTP-Referer": os.getenv("APP_URL", "http://localhost:8000"),
-            "X-Title": os.getenv("APP_NAME", "Clawdbot-Gemini")
+            "X-Title": os.getenv("APP_NAME", "Clawdbot-Gemini"),
+            "Connection": "keep-alive"
         })
+        # 扩大连接池以支持并发请求复用连接；只对幂等请求（GET 等）重试，
+        # 避免重复提交生成请求
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504])
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.conversation_history: List[Dict[str, str]] = []
         self.last_request_time: Optional[datetime] = None
         self.request_interval: float = 1.0
+        self._aclient = None
 
     def _check_rate_limit(self) -> None:
         """
@@ -125,6 +146,53 @@ class OpenRouterClient:
         """
         self._check_rate_limit()
 
+        try:
+            return self._complete(prompt, model, **kwargs)
+        except Exception as e:
+            raise Exception(f"内容生成失败: {str(e)}")
+
+    def batch_generate(self, prompts: List[str], model: Optional[str] = None,
+                       max_workers: int = 8, **kwargs) -> List[str]:
+        """
+        批量生成内容，多个请求在复用的连接上并发发送
+
+        整批只做一次速率限制检查；总耗时约等于最慢的单个请求，而不是所有请求之和
+
+        Args:
+            prompts: 提示词列表
+            model: 使用的模型名称
+            max_workers: 最大并发请求数
+            **kwargs: 其他参数（temperature、max_tokens等）
+
+        Returns:
+            List[str]: 与 prompts 一一对应的生成内容
+
+        Raises:
+            Exception: 任一请求失败时抛出
+        """
+        if not prompts:
+            return []
+
+        self._check_rate_limit()
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as pool:
+                return list(pool.map(lambda prompt: self._complete(prompt, model, **kwargs), prompts))
+        except Exception as e:
+            raise Exception(f"批量生成失败: {str(e)}")
+
+    def _complete(self, prompt: str, model: Optional[str] = None, **kwargs) -> str:
+        """
+        发送单条提示词的补全请求（不做速率限制检查）
+
+        Args:
+            prompt: 提示词
+            model: 使用的模型名称
+            **kwargs: 其他参数
+
+        Returns:
+            str: 生成的内容
+        """
         url = f"{self.base_url}/chat/completions"
 
         messages = [{"role": "user", "content": prompt}]
@@ -135,16 +203,167 @@ class OpenRouterClient:
             **kwargs
         }
 
+        response = self.session.post(url, json=payload, timeout=60)
+        response.raise_for_status()
+
+        data = response.json()
+        return data["choices"][0]["message"]["content"]
+
+    def _get_async_client(self) -> Any:
+        """
+        获取（必要时创建）异步 HTTP 客户端，所有异步请求共用连接池
+
+        Returns:
+            httpx.AsyncClient实例
+        """
+        if self._aclient is None:
+            import httpx
+
+            # Connection 是 HTTP/1.1 专用头，HTTP/2 下不允许发送
+            headers = {k: v for k, v in self.session.headers.items() if k.lower() != "connection"}
+            self._aclient = httpx.AsyncClient(
+                http2=_HTTP2_AVAILABLE,
+                timeout=60,
+                headers=headers,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+            )
+        return self._aclient
+
+    async def _acomplete(self, messages: List[Dict[str, str]], model: Optional[str] = None,
+                         **kwargs) -> str:
+        """
+        异步发送补全请求（不做速率限制检查）
+
+        Args:
+            messages: 消息列表
+            model: 使用的模型名称
+            **kwargs: 其他参数
+
+        Returns:
+            str: 生成的内容
+        """
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            **kwargs
+        }
+
+        response = await self._get_async_client().post(
+            f"{self.base_url}/chat/completions", json=payload
+        )
+        response.raise_for_status()
+
+        data = response.json()
+        return data["choices"][0]["message"]["content"]
+
+    async def achat(self, message: str, model: Optional[str] = None,
+                    system_prompt: Optional[str] = None) -> str:
+        """
+        异步发送消息并获取回复（与 chat 行为一致，包括维护对话历史）
+
+        Args:
+            message: 用户发送的消息内容
+            model: 使用的模型名称，如果为None则使用默认模型
+            system_prompt: 系统提示词，可选
+
+        Returns:
+            str: OpenRouter服务生成的回复文本
+
+        Raises:
+            Exception: API调用失败时抛出异常，包含详细错误信息
+        """
+        import httpx
+
+        self._check_rate_limit()
+
+        messages = []
+
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+
+        messages.extend(self.conversation_history)
+
+        messages.append({"role": "user", "content": message})
+
         try:
-            response = self.session.post(url, json=payload, timeout=60)
-            response.raise_for_status()
+            assistant_message = await self._acomplete(
+                messages, model, temperature=0.7, max_tokens=4096
+            )
+        except httpx.TimeoutException:
+            raise Exception("OpenRouter服务响应超时，请稍后重试")
+        except httpx.HTTPError as e:
+            raise Exception(f"OpenRouter服务请求失败: {str(e)}")
+        except (KeyError, IndexError, json.JSONDecodeError) as e:
+            raise Exception(f"OpenRouter服务响应格式错误: {str(e)}")
 
-            data = response.json()
-            return data["choices"][0]["message"]["content"]
+        self.conversation_history.append({"role": "user", "content": message})
+        self.conversation_history.append({"role": "assistant", "content": assistant_message})
+
+        if len(self.conversation_history) > 20:
+            self.conversation_history = self.conversation_history[-20:]
+
+        return assistant_message
+
+    async def agenerate_content(self, prompt: str, model: Optional[str] = None, **kwargs) -> str:
+        """
+        异步生成内容（简化接口）
+
+        Args:
+            prompt: 提示词
+            model: 使用的模型名称
+            **kwargs: 其他参数（temperature、max_tokens等）
 
+        Returns:
+            str: 生成的内容
+        """
+        self._check_rate_limit()
+
+        try:
+            return await self._acomplete([{"role": "user", "content": prompt}], model, **kwargs)
         except Exception as e:
             raise Exception(f"内容生成失败: {str(e)}")
 
+    async def batch_chat(self, messages_list: List[str], model: Optional[str] = None,
+                         system_prompt: Optional[str] = None) -> List[str]:
+        """
+        并发发送多条相互独立的消息（不使用也不修改对话历史）
+
+        整批只做一次速率限制检查；总耗时约等于最慢的单个请求
+
+        Args:
+            messages_list: 用户消息列表
+            model: 使用的模型名称
+            system_prompt: 系统提示词，可选
+
+        Returns:
+            List[str]: 与 messages_list 一一对应的回复
+
+        Raises:
+            Exception: 任一请求失败时抛出
+        """
+        if not messages_list:
+            return []
+
+        self._check_rate_limit()
+
+        system = [{"role": "system", "content": system_prompt}] if system_prompt else []
+        try:
+            return list(await asyncio.gather(*(
+                self._acomplete(system + [{"role": "user", "content": message}], model,
+                                temperature=0.7, max_tokens=4096)
+                for message in messages_list
+            )))
+        except Exception as e:
+            raise Exception(f"批量对话失败: {str(e)}")
+
+    async def aclose(self) -> None:
+        """
+        关闭异步 HTTP 客户端
+        """
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+
     def clear_history(self) -> None:
         """
         清空对话历史
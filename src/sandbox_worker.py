@@ -0,0 +1,164 @@
+"""
+Python 代码执行工作进程
+
+由 CodeExecutor 以子进程方式常驻启动，通过标准输入/输出按行交换 JSON：
+    请求: {"code": "...", "timeout": 30, "max_output": 1048576}
+    响应: {"stdout": "...", "stderr": "...", "timeout": false}
+
+工作进程自身从不执行用户代码：每段代码都在从它 fork 出的一次性子进程中运行，
+子进程对 sys.modules、builtins、os.environ、工作目录等的任何修改都随其退出而丢弃，
+同时省去了每次启动新解释器的开销。
+"""
+
+import os
+import sys
+import json
+import select
+import signal
+import tempfile
+import traceback
+
+
+# 工作进程与 CodeExecutor 通信用的文件描述符，子进程中需关闭
+_PROTOCOL_FDS = []
+
+
+def _run_snippet(code_path: str, out_fd: int, err_fd: int) -> None:
+    """
+    在 fork 出的子进程中执行代码文件，输出直接写入给定的文件描述符（不返回）
+
+    Args:
+        code_path: 代码文件路径
+        out_fd: 标准输出文件描述符
+        err_fd: 标准错误文件描述符
+    """
+    exit_code = 0
+    try:
+        for fd in _PROTOCOL_FDS:
+            os.close(fd)
+        # 自成进程组，超时时可连同其派生的进程一起终止
+        os.setpgrp()
+        os.dup2(out_fd, 1)
+        os.dup2(err_fd, 2)
+        sys.stdin = open(os.devnull, "r")
+        sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", closefd=False)
+        sys.argv = [code_path]
+
+        with open(code_path, "r", encoding="utf-8") as f:
+            code = f.read()
+        try:
+            exec(compile(code, code_path, "exec"),
+                 {"__name__": "__main__", "__file__": code_path, "__builtins__": __builtins__})
+        except SystemExit as e:
+            # 与解释器一致：非整数的退出参数打印到标准错误
+            if e.code is None or isinstance(e.code, int):
+                exit_code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                exit_code = 1
+        except BaseException as e:
+            # 跳过本函数的栈帧，只显示用户代码部分
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+            exit_code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(exit_code)
+
+
+def _read_capped(f, limit: int) -> str:
+    """
+    读取临时文件开头最多 limit 字节并解码
+
+    Args:
+        f: 临时文件对象
+        limit: 最大字节数
+
+    Returns:
+        str: 解码后的文本
+    """
+    f.seek(0)
+    return f.read(limit).decode("utf-8", errors="replace")
+
+
+def execute(code: str, timeout: float, max_output: int) -> dict:
+    """
+    在一次性子进程中执行一段代码
+
+    Args:
+        code: Python 代码
+        timeout: 超时时间（秒）
+        max_output: 每个输出流保留的最大字节数
+
+    Returns:
+        dict: 包含 stdout、stderr 与是否超时的执行结果
+    """
+    fd, code_path = tempfile.mkstemp(suffix=".py")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(code)
+
+    try:
+        with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+            # 子进程退出时写端关闭，父进程据此在超时内等待其结束
+            done_r, done_w = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(done_r)
+                _run_snippet(code_path, out.fileno(), err.fileno())
+            os.close(done_w)
+
+            try:
+                ready, _, _ = select.select([done_r], [], [], timeout)
+            finally:
+                os.close(done_r)
+            timed_out = not ready
+            if timed_out:
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except OSError:
+                    os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+            return {
+                "stdout": _read_capped(out, max_output),
+                "stderr": _read_capped(err, max_output),
+                "timeout": timed_out,
+            }
+    finally:
+        os.remove(code_path)
+
+
+def main() -> None:
+    """
+    工作进程主循环
+    """
+    # 协议使用复制出的文件描述符；原始 stdin/stdout 重定向，
+    # 避免子进程继承协议流
+    proto_in = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    proto_out = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    _PROTOCOL_FDS.extend((proto_in.fileno(), proto_out.fileno()))
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    for line in proto_in:
+        try:
+            request = json.loads(line)
+            code = request["code"]
+        except Exception as e:
+            reply = {"stdout": "", "stderr": f"无效请求: {e}", "timeout": False}
+        else:
+            try:
+                reply = execute(code, request.get("timeout", 30), request.get("max_output", 1 << 20))
+            except Exception as e:
+                reply = {"stdout": "", "stderr": f"执行失败: {e}", "timeout": False}
+
+        proto_out.write(json.dumps(reply) + "\n")
+        proto_out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 from core.agent import Agent
+from core.session import SessionManager
 from core.types import AgentMode
 
 @pytest.fixture
@@ -18,7 +19,8 @@ def mock_llm():
 
 @pytest.fixture
 def mock_session_manager():
-    return MagicMock()
+    # spec 使异步方法（aget_history 等）自动成为 AsyncMock
+    return MagicMock(spec=SessionManager)
 
 @pytest.fixture
 def agent(mock_llm, mock_session_manager):
@@ -57,3 +59,18 @@ async def test_process_message_code_generation(agent, mock_llm):
     
     # 验证模式切换
     assert result["mode"] == AgentMode.CODE_GENERATION.value
+
+@pytest.mark.asyncio
+async def test_history_not_refetched_without_memory_trigger(agent, mock_session_manager):
+    # 设置: 记忆提取不触发
+    mock_session_manager.aget_history.return_value = []
+    agent.memory_extractor = MagicMock()
+    agent.memory_extractor.should_trigger.return_value = False
+    
+    # 执行
+    result = await agent.process_message("test_user", "test_chat", "Hello")
+    
+    # 验证: 只在构建提示词时读取一次历史，长度由本地推算
+    assert result["success"] is True
+    mock_session_manager.aget_history.assert_awaited_once_with("test_chat")
+    agent.memory_extractor.should_trigger.assert_called_once_with(2)
@@ -0,0 +1,63 @@
+"""
+记忆异步写入器单元测试
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "src"
+))
+
+from core.memory import MemoryBank
+from core.async_writer import AsyncMemoryWriter
+
+
+@pytest.fixture
+def memory_bank():
+    return MemoryBank(data_dir=tempfile.mkdtemp())
+
+
+@pytest.mark.asyncio
+async def test_schedule_coalesces_writes(memory_bank):
+    """
+    测试同一用户窗口内的多次写入只落盘最后一次，且读方立即可见
+    """
+    writer = AsyncMemoryWriter(memory_bank, delay=0.01)
+    saved = []
+    original_save = memory_bank.asave_user_memory
+
+    async def record_save(user_id, content):
+        saved.append((user_id, content))
+        return await original_save(user_id, content)
+
+    memory_bank.asave_user_memory = record_save
+
+    writer.schedule("qq:1", "first")
+    writer.schedule("qq:1", "second")
+    assert await memory_bank.aget_user_memory("qq:1") == "second"
+
+    await writer.close()
+
+    assert saved == [("qq:1", "second")]
+    assert MemoryBank(data_dir=memory_bank.data_dir).get_user_memory("qq:1") == "second"
+
+
+@pytest.mark.asyncio
+async def test_delete_discards_pending_write(memory_bank):
+    """
+    测试删除记忆时丢弃尚未落盘的写入
+    """
+    writer = AsyncMemoryWriter(memory_bank, delay=0.01)
+
+    writer.schedule("qq:2", "pending")
+    await writer.delete_user_memory("qq:2")
+    await writer.close()
+
+    assert memory_bank.get_user_memory("qq:2") == ""
+    assert MemoryBank(data_dir=memory_bank.data_dir).get_user_memory("qq:2") == ""
@@ -0,0 +1,59 @@
+"""
+DuckDuckGo 搜索结果解析单元测试
+"""
+
+import unittest
+import sys
+import os
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "src"
+))
+
+from core.tools.duckduckgo_search import _parse_results
+
+
+_HTML = """
+<div class="results">
+  <div class="result results_links">
+    <a class="result__url" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fexample.com&rut=x"> example.com </a>
+    <a class="result__snippet">第一条摘要</a>
+  </div>
+  <div class="result results_links">
+    <a class="result__snippet">没有标题</a>
+  </div>
+  <div class="result">
+    <a class="result__url" href="https://third.example">third</a>
+  </div>
+</div>
+"""
+
+
+class TestParseResults(unittest.TestCase):
+    """
+    搜索结果解析测试类
+    """
+
+    def test_parse_results(self):
+        """
+        测试解析标题、链接与摘要，缺失字段为空字符串
+        """
+        results = _parse_results(_HTML, 5)
+
+        self.assertEqual(results, [
+            ("example.com", "//duckduckgo.com/l/?uddg=https%3A%2F%2Fexample.com&rut=x", "第一条摘要"),
+            ("", "", "没有标题"),
+            ("third", "https://third.example", ""),
+        ])
+
+    def test_max_results(self):
+        """
+        测试只解析前 max_results 条结果
+        """
+        self.assertEqual(len(_parse_results(_HTML, 2)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
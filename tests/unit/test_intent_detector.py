@@ -45,3 +45,22 @@ def test_get_mode_from_intent():
     assert detector.get_mode_from_intent("code_explanation") == AgentMode.CODE_EXPLANATION
     assert detector.get_mode_from_intent("debugging") == AgentMode.DEBUGGING
     assert detector.get_mode_from_intent("unknown") == AgentMode.CONVERSATION
+
+def test_detect_intent_priority_order():
+    """
+    测试同时命中多个意图时按优先级返回
+    """
+    detector = IntentDetector()
+    # debugging 关键词出现在前，但 code_explanation 优先级更高
+    assert detector.detect_intent("bug 在哪里，解释一下") == "code_explanation"
+    assert detector.detect_intent("报错了，帮我写个修复") == "code_generation"
+
+def test_rebuild_after_keyword_change():
+    """
+    测试修改关键词后重新编译匹配器
+    """
+    detector = IntentDetector()
+    detector.INTENT_KEYWORDS = {**IntentDetector.INTENT_KEYWORDS, "debugging": ["崩溃"]}
+    detector.rebuild()
+    assert detector.detect_intent("程序崩溃了") == "debugging"
+    assert detector.detect_intent("debug this") == "conversation"
@@ -0,0 +1,65 @@
+"""
+记忆库模块单元测试
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "src"
+))
+
+from core.memory import MemoryBank
+
+
+class TestMemoryBank(unittest.TestCase):
+    """
+    记忆库测试类
+    """
+
+    def setUp(self):
+        """
+        测试前置条件
+        """
+        self.data_dir = tempfile.mkdtemp()
+
+    def test_save_get_delete(self):
+        """
+        测试保存、读取（含新实例重新读取）与删除
+        """
+        bank = MemoryBank(data_dir=self.data_dir)
+
+        self.assertEqual(bank.get_user_memory("qq:1"), "")
+        self.assertTrue(bank.save_user_memory("qq:1", "  记忆内容\n"))
+        self.assertEqual(bank.get_user_memory("qq:1"), "记忆内容")
+        self.assertEqual(MemoryBank(data_dir=self.data_dir).get_user_memory("qq:1"), "记忆内容")
+
+        self.assertTrue(bank.delete_user_memory("qq:1"))
+        self.assertEqual(bank.get_user_memory("qq:1"), "")
+        self.assertEqual(MemoryBank(data_dir=self.data_dir).get_user_memory("qq:1"), "")
+
+    def test_migrate_markdown_files(self):
+        """
+        测试旧版 .md 记忆文件在启动时导入数据库且只导入一次
+        """
+        legacy_path = os.path.join(self.data_dir, "qq_2.md")
+        with open(legacy_path, "w", encoding="utf-8") as f:
+            f.write("旧记忆\n")
+
+        bank = MemoryBank(data_dir=self.data_dir)
+
+        self.assertEqual(bank.get_user_memory("qq:2"), "旧记忆")
+        self.assertFalse(os.path.exists(legacy_path))
+        self.assertTrue(os.path.exists(legacy_path + ".migrated"))
+
+        # 删除后重新打开，已导入的文件不会被再次导入
+        bank.delete_user_memory("qq:2")
+        self.assertEqual(MemoryBank(data_dir=self.data_dir).get_user_memory("qq:2"), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+记忆提取器单元测试
+"""
+
+import os
+import sys
+import tempfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "src"
+))
+
+from core.memory import MemoryBank
+from core.async_writer import AsyncMemoryWriter
+from core.memory_extractor import MemoryExtractor
+
+
+@pytest.fixture
+def extractor():
+    bank = MemoryBank(data_dir=tempfile.mkdtemp())
+    writer = AsyncMemoryWriter(bank, delay=0.01)
+    with patch("core.memory_extractor.get_memory_bank", return_value=bank), \
+            patch("core.memory_extractor.get_memory_writer", return_value=writer):
+        extractor = MemoryExtractor(trigger_interval=2)
+    extractor._gemini = MagicMock()
+    extractor._gemini.ask_question.return_value = {
+        "success": True,
+        "response": "# 用户档案 (User Profile)\n- **称呼**: 小明"
+    }
+    return extractor
+
+
+def test_should_trigger_power_of_two_and_other_intervals(extractor):
+    """
+    测试 2 的幂与非 2 的幂间隔的触发判断
+    """
+    assert [n for n in range(0, 9) if extractor.should_trigger(n)] == [2, 4, 6, 8]
+
+    with patch("core.memory_extractor.get_memory_bank"), \
+            patch("core.memory_extractor.get_memory_writer"):
+        every_three = MemoryExtractor(trigger_interval=3)
+    assert [n for n in range(0, 10) if every_three.should_trigger(n)] == [3, 6, 9]
+
+
+@pytest.mark.asyncio
+async def test_unchanged_tail_skips_gemini(extractor):
+    """
+    测试记忆与最近对话都未变化时不再调用 Gemini
+    """
+    history = [
+        {"role": "user", "content": "我叫小明"},
+        {"role": "assistant", "content": "你好小明"},
+    ]
+
+    assert await extractor.extract_and_update("qq:1", history) is True
+    # 对话无变化时跳过提取，返回值与成功更新区分开
+    assert await extractor.extract_and_update("qq:1", history) is None
+    assert extractor._gemini.ask_question.call_count == 1
+
+    history.append({"role": "user", "content": "我喜欢猫"})
+    assert await extractor.extract_and_update("qq:1", history)
+    assert extractor._gemini.ask_question.call_count == 2
+
+    await extractor.memory_writer.close()
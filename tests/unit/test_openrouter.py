@@ -98,6 +98,31 @@ class TestOpenRouterClient(unittest.TestCase):
         self.assertEqual(messages[0]["role"], "system")
         self.assertEqual(messages[0]["content"], "You are a helpful assistant")
     
+    def test_chat_with_prompt_cache(self):
+        """
+        测试开启提示词缓存时系统消息带有 cache_control 标记
+        """
+        client = OpenRouterClient(api_key="test_api_key", prompt_cache=True)
+        mock_session = Mock()
+        mock_response = Mock()
+        mock_response.json.return_value = {
+            "choices": [{"message": {"content": "Cached"}}],
+            "usage": {}
+        }
+        mock_response.raise_for_status = Mock()
+        mock_session.post.return_value = mock_response
+        client.session = mock_session
+        
+        client.chat("User message", system_prompt="You are a helpful assistant")
+        
+        system_message = mock_session.post.call_args[1]["json"]["messages"][0]
+        self.assertEqual(system_message["role"], "system")
+        self.assertEqual(system_message["content"], [{
+            "type": "text",
+            "text": "You are a helpful assistant",
+            "cache_control": {"type": "ephemeral"}
+        }])
+    
     @patch('adapters.llm.openrouter_client.requests.Session')
     def test_chat_with_thinking(self, mock_session_class):
         """
@@ -0,0 +1,171 @@
+"""
+OpenRouter异步接口单元测试
+"""
+
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "src"
+))
+
+from openrouter import OpenRouterClient
+
+
+def _reply(content):
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+@pytest.fixture
+def requests_seen():
+    return []
+
+
+@pytest.fixture
+def client(monkeypatch, requests_seen):
+    """
+    异步客户端的请求全部交给 MockTransport 处理，handler 由测试设置
+    """
+    real_client = httpx.AsyncClient
+    cl = OpenRouterClient(api_key="test_api_key", model="test-model")
+
+    def handle(request):
+        requests_seen.append(request)
+        return cl.handler(request)
+
+    monkeypatch.setattr(
+        httpx, "AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handle), **kwargs)
+    )
+    cl.handler = lambda request: _reply("ok")
+    return cl
+
+
+@pytest.mark.asyncio
+async def test_achat_payload_and_history(client, requests_seen):
+    """
+    测试 achat 的请求内容、回复解析以及对话历史维护
+    """
+    client.handler = lambda request: _reply("你好")
+
+    assert await client.achat("hi", system_prompt="sys") == "你好"
+
+    request = requests_seen[0]
+    assert request.url == "https://openrouter.ai/api/v1/chat/completions"
+    assert request.headers["Authorization"] == "Bearer test_api_key"
+    assert request.headers["X-Title"] == client.session.headers["X-Title"]
+    payload = json.loads(request.content)
+    assert payload["model"] == "test-model"
+    assert payload["messages"] == [
+        {"role": "system", "content": "sys"},
+        {"role": "user", "content": "hi"},
+    ]
+    assert client.get_history() == [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "你好"},
+    ]
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("handler, message", [
+    (lambda request: httpx.Response(500, text="boom"), "OpenRouter服务请求失败"),
+    (lambda request: httpx.Response(200, json={"choices": []}), "OpenRouter服务响应格式错误"),
+    (lambda request: httpx.Response(200, text="not json"), "OpenRouter服务响应格式错误"),
+])
+async def test_achat_error_mapping(client, handler, message):
+    """
+    测试 achat 将 HTTP 错误与格式错误转换为统一的错误信息，且不写入对话历史
+    """
+    client.handler = handler
+
+    with pytest.raises(Exception, match=message):
+        await client.achat("hi")
+    assert client.get_history() == []
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_achat_timeout(client):
+    """
+    测试 achat 的超时错误信息
+    """
+    def timeout(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    client.handler = timeout
+
+    with pytest.raises(Exception, match="OpenRouter服务响应超时"):
+        await client.achat("hi")
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_agenerate_content_passes_kwargs(client, requests_seen):
+    """
+    测试 agenerate_content 透传额外参数
+    """
+    assert await client.agenerate_content("prompt", model="other", temperature=0.1) == "ok"
+
+    payload = json.loads(requests_seen[0].content)
+    assert payload == {
+        "model": "other",
+        "messages": [{"role": "user", "content": "prompt"}],
+        "temperature": 0.1,
+    }
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_batch_chat_order_and_failure(client):
+    """
+    测试 batch_chat 按输入顺序返回结果，任一请求失败时整体报错
+    """
+    client.handler = lambda request: _reply(json.loads(request.content)["messages"][-1]["content"].upper())
+
+    assert await client.batch_chat(["a", "b", "c"]) == ["A", "B", "C"]
+    assert client.get_history() == []
+
+    def fail_on_b(request):
+        if json.loads(request.content)["messages"][-1]["content"] == "b":
+            return httpx.Response(500)
+        return _reply("ok")
+
+    client.handler = fail_on_b
+    client.last_request_time = None
+
+    with pytest.raises(Exception, match="批量对话失败"):
+        await client.batch_chat(["a", "b", "c"])
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_aclose_releases_client(client):
+    """
+    测试 aclose 关闭并释放异步客户端，之后再次请求会新建客户端
+    """
+    await client.agenerate_content("prompt")
+    first = client._aclient
+
+    await client.aclose()
+
+    assert first.is_closed
+    assert client._aclient is None
+
+    client.last_request_time = None
+    await client.agenerate_content("prompt")
+    assert client._aclient is not None and client._aclient is not first
+
+    await client.aclose()
+    await client.aclose()
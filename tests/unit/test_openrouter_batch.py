@@ -0,0 +1,82 @@
+"""
+OpenRouter批量生成单元测试
+"""
+
+import os
+import sys
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "src"
+))
+
+from openrouter import OpenRouterClient
+
+
+def _post_handler(reply):
+    """
+    构造 session.post 的替身，reply(prompt) 返回回复内容或抛出异常
+    """
+    def post(url, json=None, timeout=None):
+        response = Mock()
+        response.raise_for_status = Mock()
+        response.json.return_value = {"choices": [{"message": {"content": reply(json["messages"][0]["content"])}}]}
+        return response
+    return post
+
+
+@pytest.fixture
+def client():
+    cl = OpenRouterClient(api_key="test_api_key", model="test-model")
+    cl.session = Mock()
+    return cl
+
+
+def test_batch_generate_preserves_order_under_concurrency(client):
+    """
+    测试请求并发执行，且先完成的请求不会打乱结果顺序
+    """
+    prompts = ["p0", "p1", "p2", "p3"]
+    # 所有请求都进入后才放行，串行执行时会在此超时
+    barrier = threading.Barrier(len(prompts), timeout=5)
+
+    def reply(prompt):
+        barrier.wait()
+        # 靠前的提示词更晚完成
+        time.sleep(0.01 * (len(prompts) - int(prompt[1:])))
+        return prompt.upper()
+
+    client.session.post.side_effect = _post_handler(reply)
+
+    assert client.batch_generate(prompts, max_workers=len(prompts)) == ["P0", "P1", "P2", "P3"]
+    assert client.session.post.call_count == len(prompts)
+
+
+def test_batch_generate_empty(client):
+    """
+    测试空列表直接返回，不发送请求
+    """
+    assert client.batch_generate([]) == []
+    client.session.post.assert_not_called()
+
+
+def test_batch_generate_single_failure(client):
+    """
+    测试任一请求失败时整批报错并带上原始错误信息
+    """
+    def reply(prompt):
+        if prompt == "bad":
+            raise requests.exceptions.HTTPError("500 Server Error")
+        return prompt
+
+    client.session.post.side_effect = _post_handler(reply)
+
+    with pytest.raises(Exception, match="批量生成失败: 500 Server Error"):
+        client.batch_generate(["ok", "bad", "ok"])
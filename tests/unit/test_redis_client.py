@@ -0,0 +1,46 @@
+"""
+Redis客户端单元测试
+"""
+
+import os
+import sys
+
+import pytest
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "src"
+))
+
+from infrastructure.redis_client import RedisClient
+
+
+@pytest.mark.asyncio
+async def test_unavailable_redis_falls_back():
+    """
+    测试Redis不可用时异步操作返回降级值
+    """
+    client = RedisClient(host="127.0.0.1", port=1)
+
+    assert await client.get_client() is None
+    assert not await client.is_available()
+    assert await client.get("k") is None
+    assert await client.set("k", "v") is False
+    assert await client.lpush("k", "v") == 0
+    assert await client.lrange("k", 0, -1) == []
+    assert await client.hgetall("h") == {}
+    assert await client.pipeline() is None
+    assert await client.warmup() == 0
+    await client.close()
+
+
+def test_unix_socket_connection_params():
+    """
+    测试配置UNIX域套接字时使用 path 而不是 host/port
+    """
+    params = RedisClient(unix_socket_path="/var/run/redis/redis.sock")._get_connection_params()
+
+    assert params["path"] == "/var/run/redis/redis.sock"
+    assert "host" not in params and "port" not in params
+    assert "path" not in RedisClient(host="127.0.0.1")._get_connection_params()
@@ -0,0 +1,67 @@
+"""
+Python 代码执行工作进程单元测试
+"""
+
+import os
+import sys
+import unittest
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "src"
+))
+
+from sandbox_worker import execute
+
+
+class TestSandboxWorker(unittest.TestCase):
+    """
+    工作进程测试类
+    """
+
+    def test_state_does_not_leak_between_runs(self):
+        """
+        测试一段代码对环境变量、builtins、模块与工作目录的修改不影响下一段代码
+        """
+        first = execute(
+            "import os, builtins, json\n"
+            "os.environ['SANDBOX_LEAK'] = '1'\n"
+            "builtins.sandbox_leak = 1\n"
+            "json.dumps = None\n"
+            "os.chdir('/')\n"
+            "print(__file__.endswith('.py'))\n",
+            timeout=10, max_output=1 << 20
+        )
+        self.assertEqual(first["stdout"], "True\n")
+
+        second = execute(
+            "import os, builtins, json\n"
+            "print(os.environ.get('SANDBOX_LEAK'), hasattr(builtins, 'sandbox_leak'),\n"
+            "      json.dumps is None, os.getcwd() == '/')\n",
+            timeout=10, max_output=1 << 20
+        )
+        self.assertEqual(second["stdout"], "None False False False\n")
+        self.assertNotIn("SANDBOX_LEAK", os.environ)
+
+    def test_traceback_and_timeout(self):
+        """
+        测试异常输出到 stderr，超时的代码被终止
+        """
+        failed = execute("raise ValueError('bad')", timeout=10, max_output=1 << 20)
+        self.assertIn("ValueError: bad", failed["stderr"])
+        self.assertFalse(failed["timeout"])
+
+        hung = execute("while True: pass", timeout=0.5, max_output=1 << 20)
+        self.assertTrue(hung["timeout"])
+
+    def test_output_capped(self):
+        """
+        测试输出按上限截断
+        """
+        result = execute("print('x' * 1000)", timeout=10, max_output=10)
+        self.assertEqual(result["stdout"], "x" * 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
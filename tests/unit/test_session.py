@@ -32,7 +32,7 @@ class TestSessionManager(unittest.TestCase):
         )
         # Mock _get_redis_client to always return None (force memory mode)
         self.manager._get_redis_client = Mock(return_value=None)
-        self.manager._memory_history = {} # Ensure clean slate
+        self.manager._memory_history.clear() # Ensure clean slate
 
     def test_add_message(self):
         """
@@ -141,6 +141,55 @@ class TestSessionManager(unittest.TestCase):
         # 应该保留最近的消息. Implementation uses max_history * 2 for buffer
         self.assertLessEqual(len(history), self.manager.max_history * 2)
     
+    def test_memory_sessions_lru_evicted(self):
+        """
+        测试内存存储超过会话数上限时淘汰最久未使用的会话
+        """
+        self.manager.max_sessions = 2
+        
+        self.manager.add_message("s1", "user", "a")
+        self.manager.add_message("s2", "user", "b")
+        self.manager.get_history("s1")  # s1 变为最近使用
+        self.manager.add_message("s3", "user", "c")
+        
+        self.assertTrue(self.manager.session_exists("s1"))
+        self.assertFalse(self.manager.session_exists("s2"))
+        self.assertTrue(self.manager.session_exists("s3"))
+    
+    @patch("core.session.time.monotonic")
+    def test_memory_sessions_expire_when_idle(self, mock_monotonic):
+        """
+        测试内存存储中空闲超时的会话被清除，活跃会话保留
+        """
+        self.manager._memory_ttl = 50
+        
+        mock_monotonic.return_value = 0
+        self.manager.add_message("idle", "user", "a")
+        mock_monotonic.return_value = 40
+        self.manager.add_message("active", "user", "b")
+        
+        mock_monotonic.return_value = 80
+        self.assertFalse(self.manager.session_exists("idle"))
+        self.assertEqual(self.manager.get_history("idle"), [])
+        self.assertEqual(len(self.manager.get_history("active")), 1)
+    
+    def test_add_turn(self):
+        """
+        测试一次写入一轮问答及其前置消息
+        """
+        session_id = "test_user:turn"
+        
+        self.manager.add_turn(
+            session_id, "Question", "Answer",
+            preceding=[{"role": "assistant", "content": "[Search: q]"}]
+        )
+        
+        history = self.manager.get_history(session_id)
+        self.assertEqual(
+            [(msg["role"], msg["content"]) for msg in history],
+            [("assistant", "[Search: q]"), ("user", "Question"), ("assistant", "Answer")]
+        )
+    
     def test_session_exists(self):
         """
         测试会话存在性检查
@@ -190,6 +239,63 @@ class TestSessionManagerWithRedis(unittest.TestCase):
         # Check against the patched class
         self.assertEqual(client, mock_redis)
     
+    @patch('redis.Redis')
+    def test_redis_pool_shared_between_managers(self, mock_redis_class):
+        """
+        测试相同连接参数的会话管理器共享同一个连接池
+        """
+        other = SessionManager(redis_host="localhost", redis_port=6379, max_history=5)
+        for manager in (self.manager, other):
+            manager.redis_enabled = True
+            manager._get_redis_client()
+        
+        pools = [call.kwargs["connection_pool"] for call in mock_redis_class.call_args_list]
+        self.assertEqual(len(pools), 2)
+        self.assertIs(pools[0], pools[1])
+    
+    def test_warmup_opens_connections_on_shared_pool(self):
+        """
+        测试预热在会话管理器实际使用的连接池中同时建立多个连接并归还
+        """
+        mock_pool = Mock()
+        self.manager._get_redis_client = Mock(return_value=Mock(connection_pool=mock_pool))
+        
+        self.assertEqual(self.manager.warmup(size=3), 3)
+        self.assertEqual(mock_pool.get_connection.call_count, 3)
+        self.assertEqual(mock_pool.release.call_count, 3)
+    
+    def test_warmup_without_redis(self):
+        """
+        测试未启用 Redis 时预热直接返回
+        """
+        self.assertEqual(self.manager.warmup(), 0)
+    
+    def test_client_cache_pool(self):
+        """
+        测试开启客户端缓存时使用 RESP3 并启用本地缓存，且不与普通连接池共用
+        """
+        from core.session import _get_redis_pool
+        
+        cached = _get_redis_pool("localhost", 6379, 0, None, client_cache=True)
+        plain = _get_redis_pool("localhost", 6379, 0, None)
+        
+        self.assertIsNotNone(cached.cache)
+        self.assertEqual(cached.connection_kwargs["protocol"], 3)
+        self.assertIsNone(plain.cache)
+        self.assertIsNot(cached, plain)
+    
+    def test_client_cache_pool_without_support(self):
+        """
+        测试 redis 版本不支持客户端缓存时退回普通连接池
+        """
+        from core.session import _get_redis_pool
+        
+        with patch.dict(sys.modules, {"redis.cache": None}):
+            pool = _get_redis_pool("localhost", 6390, 0, None, client_cache=True)
+        
+        self.assertIsNone(pool.cache)
+        self.assertNotIn("protocol", pool.connection_kwargs)
+    
     @patch('redis.Redis')
     def test_redis_failure_fallback(self, mock_redis_class):
         """
@@ -215,6 +321,75 @@ class TestSessionManagerWithRedis(unittest.TestCase):
         self.assertEqual(len(history), 1)
 
 
+    def test_connection_params_fall_back_to_env(self):
+        """
+        测试未传入的连接参数使用环境变量，显式传入的值（包括 0）优先
+        """
+        import core.session
+        
+        with patch.dict(core.session._ENV_REDIS, {"host": "redis.env", "port": 7000, "db": 3}):
+            from_env = SessionManager()
+            explicit = SessionManager(redis_host="localhost", redis_port=6379, redis_db=0)
+        
+        self.assertEqual((from_env.redis_host, from_env.redis_port, from_env.redis_db), ("redis.env", 7000, 3))
+        self.assertEqual((explicit.redis_host, explicit.redis_port, explicit.redis_db), ("localhost", 6379, 0))
+    
+    def test_add_turn_uses_single_pipeline(self):
+        """
+        测试 Redis 模式下一轮问答通过一个管道写入
+        """
+        mock_redis = MagicMock()
+        pipe = mock_redis.pipeline.return_value
+        self.manager._get_redis_client = Mock(return_value=mock_redis)
+        
+        self.manager.add_turn("test_session", "Hello", "Hi")
+        
+        mock_redis.pipeline.assert_called_once()
+        self.assertEqual(
+            [(c.args[1]["role"], c.args[1]["content"]) for c in pipe.xadd.call_args_list],
+            [("user", "Hello"), ("assistant", "Hi")]
+        )
+        for c in pipe.xadd.call_args_list:
+            self.assertEqual(c.args[0], "clawdbot:session_stream:{test_session}")
+            self.assertEqual(c.kwargs["maxlen"], 10)
+        pipe.execute.assert_called_once()
+        mock_redis.xadd.assert_not_called()
+
+    def test_add_message_uses_single_pipeline(self):
+        """
+        测试 Redis 模式下单条消息通过一个管道写入，且不再单独查询长度
+        """
+        mock_redis = MagicMock()
+        pipe = mock_redis.pipeline.return_value
+        self.manager._get_redis_client = Mock(return_value=mock_redis)
+        
+        self.manager.add_message("test_session", "user", "Hello")
+        
+        pipe.xadd.assert_called_once()
+        pipe.execute.assert_called_once()
+        mock_redis.llen.assert_not_called()
+
+    def test_get_last_messages_fetches_tail_only(self):
+        """
+        测试 Redis 模式下获取最近N条消息只请求尾部区间
+        """
+        mock_redis = MagicMock()
+        mock_redis.xrevrange.return_value = [
+            ("2-0", {"role": "assistant", "content": "Hello"}),
+            ("1-0", {"role": "user", "content": "Hi"}),
+        ]
+        self.manager._get_redis_client = Mock(return_value=mock_redis)
+        
+        last = self.manager.get_last_messages("test_session", 3)
+        
+        mock_redis.xrevrange.assert_called_once_with("clawdbot:session_stream:{test_session}", count=3)
+        mock_redis.xrange.assert_not_called()
+        self.assertEqual(last, [
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "Hello"},
+        ])
+
+
 class TestSessionManagerSingleton(unittest.TestCase):
     """
     会话管理器单例测试类
@@ -0,0 +1,40 @@
+"""
+回调ID解析单元测试
+"""
+
+import unittest
+import sys
+import os
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "src"
+))
+
+from core.types import SessionTarget, parse_session_target
+
+
+class TestParseSessionTarget(unittest.TestCase):
+    """
+    回调ID解析测试类
+    """
+
+    def test_parse_session_target(self):
+        """
+        测试各种回调ID格式的解析结果
+        """
+        cases = {
+            "qq:group:123": SessionTarget("qq", "group", "123"),
+            "lark:private:oc_a:b": SessionTarget("lark", "private", "oc_a:b"),
+            "qq:user:1:2024-01-01": SessionTarget("qq", "private", "user:1:2024-01-01"),
+            "lark:oc_1": SessionTarget("lark", "private", "oc_1"),
+            "10001": SessionTarget("qq", "private", "10001"),
+        }
+        for session_id, expected in cases.items():
+            with self.subTest(session_id=session_id):
+                self.assertEqual(parse_session_target(session_id), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -26,16 +26,14 @@ class TestSettings(unittest.TestCase):
         测试前置条件
         """
         # 重置配置单例
-        import config.settings
-        config.settings._settings = None
+        get_settings.cache_clear()
     
     def tearDown(self):
         """
         测试后清理
         """
         # 重置配置单例
-        import config.settings
-        config.settings._settings = None
+        get_settings.cache_clear()
     
     @patch.dict(os.environ, {
         "FEISHU_APP_ID": "test_app_id",
@@ -126,6 +124,39 @@ class TestSettings(unittest.TestCase):
         self.assertFalse(is_valid)
         self.assertTrue(any("DeepSeek" in error for error in errors))
 
+    def test_lazy_field_cached_until_reload(self):
+        """
+        测试字段首次访问时解析并缓存，reload 后重新解析
+        """
+        with patch.dict(os.environ, {"REDIS_PORT": "7000"}):
+            settings = Settings.from_env()
+            self.assertNotIn("redis_port", settings.__dict__)
+            self.assertEqual(settings.redis_port, 7000)
+
+            os.environ["REDIS_PORT"] = "7001"
+            self.assertEqual(settings.redis_port, 7000)
+
+            settings.reload()
+            self.assertEqual(settings.redis_port, 7001)
+
+    def test_unknown_field_rejected(self):
+        """
+        测试传入未知字段时抛出异常
+        """
+        with self.assertRaises(TypeError):
+            Settings(not_a_field="x")
+
+    def test_settings_frozen(self):
+        """
+        测试配置实例不可修改
+        """
+        from dataclasses import FrozenInstanceError
+
+        settings = Settings(app_port=9000)
+        with self.assertRaises(FrozenInstanceError):
+            settings.app_port = 9001
+        self.assertEqual(settings.app_port, 9000)
+
 
 class TestSettingsSingleton(unittest.TestCase):
     """
@@ -136,8 +167,7 @@ class TestSettingsSingleton(unittest.TestCase):
         """
         测试后清理
         """
-        import config.settings
-        config.settings._settings = None
+        get_settings.cache_clear()
     
     def test_get_settings(self):
         """